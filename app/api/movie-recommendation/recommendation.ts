@@ -0,0 +1,16 @@
+// Converts the Python service's /recommend body to the client's camelCase shape
+export function toRecommendationBody(data: any) {
+  return {
+    singleRecommendation: data.single_recommendation,
+    tenRecommendations: data.ten_recommendations,
+    input: data.input,
+    mood: data.mood,
+    conversationCount: data.conversation_count,
+    turn: data.turn,
+    sessionId: data.session_id,
+    aiResponse: data.ai_response,
+    isAskingQuestion: data.is_asking_question,
+    conversationComplete: data.conversation_complete,
+    userPreferences: data.user_preferences
+  }
+}
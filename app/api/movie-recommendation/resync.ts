@@ -0,0 +1,15 @@
+// Converts the Python service's 409 resync body to the client's camelCase shape
+export function toResyncBody(data: any) {
+  return {
+    resync: true,
+    expectedTurn: data.expected_turn,
+    sessionId: data.session_id,
+    conversationCount: data.conversation_count,
+    conversationHistory: (data.conversation_history || []).map((msg: any) => ({
+      text: msg.text,
+      isUser: msg.is_user,
+      timestamp: msg.timestamp
+    })),
+    userPreferences: data.user_preferences
+  }
+}
@@ -1,8 +1,10 @@
 import { NextRequest, NextResponse } from 'next/server'
+import { toResyncBody } from './resync'
+import { toRecommendationBody } from './recommendation'
 
 export async function POST(request: NextRequest) {
   try {
-    const { text, sessionId, conversationHistory } = await request.json()
+    const { text, sessionId, turn } = await request.json()
     
     if (!text) {
       return NextResponse.json(
@@ -18,7 +20,7 @@ export async function POST(request: NextRequest) {
       )
     }
 
-    // Call the Python Flask service with conversation history
+    // Send only the new message; the session on the Python side holds the history
     const response = await fetch('http://localhost:5000/recommend', {
       method: 'POST',
       headers: {
@@ -27,28 +29,23 @@ export async function POST(request: NextRequest) {
       body: JSON.stringify({ 
         text, 
         session_id: sessionId,
-        conversation_history: conversationHistory || []
+        turn
       }),
     })
 
+    // The turn number did not follow the server's; hand back its copy of the conversation
+    if (response.status === 409) {
+      const data = await response.json()
+      return NextResponse.json(toResyncBody(data), { status: 409 })
+    }
+
     if (!response.ok) {
       throw new Error(`Python service error: ${response.status}`)
     }
 
     const data = await response.json()
     
-    return NextResponse.json({
-      singleRecommendation: data.single_recommendation,
-      tenRecommendations: data.ten_recommendations,
-      input: data.input,
-      mood: data.mood,
-      conversationCount: data.conversation_count,
-      sessionId: data.session_id,
-      aiResponse: data.ai_response,
-      isAskingQuestion: data.is_asking_question,
-      conversationComplete: data.conversation_complete,
-      userPreferences: data.user_preferences
-    })
+    return NextResponse.json(toRecommendationBody(data))
     
   } catch (error: any) {
     console.error('Error getting movie recommendation:', error)
@@ -57,4 +54,4 @@ export async function POST(request: NextRequest) {
       { status: 500 }
     )
   }
-} 
\ No newline at end of file
+}
@@ -0,0 +1,94 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { toResyncBody } from '../resync'
+import { toRecommendationBody } from '../recommendation'
+import { formatSseEvent, parseSseEvent, splitSseEvents } from '../../../sse'
+
+// Rewrites the Python service's events into the client's camelCase shape as they pass through
+function toClientEvents() {
+  const decoder = new TextDecoder()
+  const encoder = new TextEncoder()
+  let buffer = ''
+
+  const convert = (raw: string) => {
+    const { event, data } = parseSseEvent(raw)
+    if (event === 'recommendation') {
+      return formatSseEvent({ event, data: toRecommendationBody(data) })
+    }
+    if (event === 'resync') {
+      return formatSseEvent({ event, data: toResyncBody(data) })
+    }
+    return formatSseEvent({ event, data })
+  }
+
+  return new TransformStream<Uint8Array, Uint8Array>({
+    transform(chunk, controller) {
+      const [events, rest] = splitSseEvents(buffer + decoder.decode(chunk, { stream: true }))
+      buffer = rest
+      for (const raw of events) {
+        controller.enqueue(encoder.encode(convert(raw)))
+      }
+    },
+    flush(controller) {
+      if (buffer.trim()) {
+        controller.enqueue(encoder.encode(convert(buffer)))
+      }
+    }
+  })
+}
+
+export async function POST(request: NextRequest) {
+  try {
+    const { text, sessionId, turn } = await request.json()
+    
+    if (!text) {
+      return NextResponse.json(
+        { error: 'No text provided' },
+        { status: 400 }
+      )
+    }
+
+    if (!sessionId) {
+      return NextResponse.json(
+        { error: 'No session ID provided' },
+        { status: 400 }
+      )
+    }
+
+    // Call the Python Flask streaming endpoint and relay its Server-Sent Events as they arrive
+    const response = await fetch('http://localhost:5000/recommend/stream', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ 
+        text, 
+        session_id: sessionId,
+        turn
+      }),
+    })
+
+    if (response.status === 409) {
+      const data = await response.json()
+      return NextResponse.json(toResyncBody(data), { status: 409 })
+    }
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Python service error: ${response.status}`)
+    }
+
+    return new Response(response.body.pipeThrough(toClientEvents()), {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive'
+      }
+    })
+    
+  } catch (error: any) {
+    console.error('Error streaming movie recommendation:', error)
+    return NextResponse.json(
+      { error: 'Failed to stream movie recommendation' },
+      { status: 500 }
+    )
+  }
+}
@@ -26,6 +26,7 @@ interface ChatWindowProps {
   singleRecommendation: string | null
   tenRecommendations: string | null
   isLoadingRecommendation: boolean
+  streamingResponse?: string | null
   recommendationError: string | null
   conversationCount: number
   onClear: () => void
@@ -43,6 +44,7 @@ export function ChatWindow({
   singleRecommendation,
   tenRecommendations,
   isLoadingRecommendation,
+  streamingResponse,
   recommendationError,
   conversationCount,
   onClear,
@@ -307,8 +309,13 @@ export function ChatWindow({
           ))
         )}
         
+        {/* Reply text as it streams in */}
+        {isLoadingRecommendation && streamingResponse && (
+          <ChatBubble message={streamingResponse} isUser={false} />
+        )}
+        
         {/* Loading indicator */}
-        {isLoadingRecommendation && (
+        {isLoadingRecommendation && !streamingResponse && (
           <div className="flex items-center space-x-2 p-4 bg-gray-700/50 rounded-xl ml-4">
             <div className="animate-spin rounded-full h-6 w-6 border-b-2 border-orange-500"></div>
             <span className="text-gray-300">
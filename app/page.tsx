@@ -2,6 +2,7 @@
 
 import { useState, useCallback, useEffect } from 'react'
 import { ChatWindow } from './components/ChatWindow'
+import { SseEvent, parseSseEvent, splitSseEvents } from './sse'
 
 interface ConversationMessage {
   id: string
@@ -17,6 +18,30 @@ interface ConversationMessage {
   userPreferences?: any
 }
 
+// Reads a /recommend/stream response, passing ai_response text to onText as it arrives;
+// resolves with the final recommendation or resync event
+async function readRecommendationStream(response: Response, onText: (delta: string) => void) {
+  const reader = response.body!.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let result: SseEvent | null = null
+
+  while (true) {
+    const { done, value } = await reader.read()
+    const [events, rest] = splitSseEvents(buffer + decoder.decode(value, { stream: !done }) + (done ? '\n\n' : ''))
+    buffer = rest
+    for (const raw of events) {
+      const event = parseSseEvent(raw)
+      if (event.event === 'ai_response') {
+        onText(event.data.text)
+      } else {
+        result = event
+      }
+    }
+    if (done) return result
+  }
+}
+
 export default function Home() {
   const [transcription, setTranscription] = useState('')
   const [isRecording, setIsRecording] = useState(false)
@@ -27,7 +52,11 @@ export default function Home() {
   const [conversationCount, setConversationCount] = useState(0)
   const [sessionId, setSessionId] = useState<string | null>(null)
   const [conversationHistory, setConversationHistory] = useState<ConversationMessage[]>([])
+  // Sequence number of the last turn the server accepted; only the new message is sent each turn
+  const [turn, setTurn] = useState(0)
   const [currentAiResponse, setCurrentAiResponse] = useState<string | null>(null)
+  // Assistant text received so far for the turn in flight
+  const [streamingResponse, setStreamingResponse] = useState<string | null>(null)
   const [isAskingQuestion, setIsAskingQuestion] = useState(false)
   const [conversationComplete, setConversationComplete] = useState(false)
   const [userPreferences, setUserPreferences] = useState<any>(null)
@@ -72,6 +101,7 @@ export default function Home() {
     setTenRecommendations(null)
     setRecommendationError(null)
     setConversationCount(0)
+    setTurn(0)
     setConversationHistory([])
     setCurrentAiResponse(null)
     setIsAskingQuestion(false)
@@ -93,32 +123,83 @@ export default function Home() {
     setRecommendationError(null)
     
     try {
-      // Prepare conversation history for the API
-      const historyForApi = conversationHistory.map(msg => ({
-        text: msg.text,
-        isUser: msg.isUser,
-        timestamp: msg.timestamp.toISOString()
-      }))
-
-      const response = await fetch('/api/movie-recommendation', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ 
-          text, 
-          sessionId,
-          conversationHistory: historyForApi
-        }),
-      })
+      // Streams the reply; resolves with the recommendation body, or the server's resync body if the turn was not accepted
+      const sendTurn = async (nextTurn: number): Promise<{ data: any, resync: any }> => {
+        setStreamingResponse(null)
+        const response = await fetch('/api/movie-recommendation/stream', {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ 
+            text, 
+            sessionId,
+            turn: nextTurn
+          }),
+        })
 
-      if (!response.ok) {
+        if (response.status === 409) {
+          return { data: null, resync: await response.json() }
+        }
+        if (!response.ok || !response.body) {
+          throw new Error('Failed to get recommendation')
+        }
+
+        const result = await readRecommendationStream(response, delta => {
+          setStreamingResponse(prev => (prev || '') + delta)
+        })
+        if (result && result.event === 'resync') {
+          return { data: null, resync: result.data }
+        }
+        if (!result || result.event !== 'recommendation') {
+          throw new Error('Recommendation stream ended without a result')
+        }
+        return { data: result.data, resync: null }
+      }
+
+      const nextTurn = turn + 1
+      let result = await sendTurn(nextTurn)
+
+      // Out of sync with the server (e.g. a lost response, an expired session, or another
+      // request for this session saved first): adopt its copy of the conversation
+      if (result.resync) {
+        const resync = result.resync
+        const serverHistory: ConversationMessage[] = resync.conversationHistory.map((msg: any, i: number) => ({
+          id: `resync-${i}`,
+          text: msg.text,
+          isUser: msg.isUser,
+          timestamp: new Date(msg.timestamp * 1000)
+        }))
+        const lastUserMessage = [...serverHistory].reverse().find(msg => msg.isUser)
+
+        // The server already answered this message as the turn we sent (only its response was lost):
+        // show its reply instead of sending the message a second time
+        if (resync.expectedTurn === nextTurn + 1 && lastUserMessage && lastUserMessage.text === text) {
+          const lastMessage = serverHistory[serverHistory.length - 1]
+          setConversationHistory(serverHistory)
+          setTurn(nextTurn)
+          setConversationCount(resync.conversationCount)
+          setUserPreferences(resync.userPreferences)
+          setCurrentAiResponse(lastMessage && !lastMessage.isUser ? lastMessage.text : null)
+          setTranscription('')
+          return
+        }
+
+        // Otherwise the server never saw this message: resend it once as the turn it expects
+        setConversationHistory([
+          ...serverHistory,
+          { id: Date.now().toString(), text, isUser: true, timestamp: new Date() }
+        ])
+        result = await sendTurn(resync.expectedTurn)
+      }
+
+      const data = result.data
+      if (!data) {
         throw new Error('Failed to get recommendation')
       }
 
-      const data = await response.json()
-      
       // Update states based on response
+      setTurn(data.turn)
       setSingleRecommendation(data.singleRecommendation)
       setTenRecommendations(data.tenRecommendations)
       setConversationCount(data.conversationCount)
@@ -136,6 +217,7 @@ export default function Home() {
       // Clear transcription even on error to prevent re-triggering
       setTranscription('')
     } finally {
+      setStreamingResponse(null)
       setIsLoadingRecommendation(false)
     }
   }
@@ -192,6 +274,7 @@ export default function Home() {
       singleRecommendation={singleRecommendation}
       tenRecommendations={tenRecommendations}
       isLoadingRecommendation={isLoadingRecommendation}
+      streamingResponse={streamingResponse}
       recommendationError={recommendationError}
       conversationCount={conversationCount}
       onClear={handleClearTranscription}
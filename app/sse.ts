@@ -0,0 +1,30 @@
+// Server-Sent Events helpers shared by the stream proxy route and the page
+
+export interface SseEvent {
+  event: string
+  data: any
+}
+
+// Splits buffered stream text into complete events and the unfinished remainder
+export function splitSseEvents(buffer: string): [string[], string] {
+  const parts = buffer.split('\n\n')
+  const rest = parts.pop() || ''
+  return [parts.filter(part => part.trim().length > 0), rest]
+}
+
+export function parseSseEvent(raw: string): SseEvent {
+  let event = 'message'
+  const data: string[] = []
+  for (const line of raw.split('\n')) {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim()
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trim())
+    }
+  }
+  return { event, data: data.length ? JSON.parse(data.join('\n')) : null }
+}
+
+export function formatSseEvent({ event, data }: SseEvent) {
+  return `event: ${event}\ndata: ${JSON.stringify(data)}\n\n`
+}
@@ -0,0 +1,146 @@
+"""Asyncio serving mode for the recommender, as a plain ASGI application.
+
+Serves /recommend, /new-chat, /health and /metrics with the same request and
+response bodies as the Flask app. Model calls are awaited instead of holding
+a worker thread, so one process can keep hundreds of conversations waiting
+on the model at once. Each turn runs the same flow as the Flask app
+(movie_recommender.response_flow); only the waiting differs.
+
+    pip install uvicorn
+    uvicorn asgi_app:app --port 5000
+
+Streaming (/recommend/stream) and /recommend/batch are only served by Flask.
+"""
+import asyncio
+import json
+import uuid
+from time import perf_counter
+
+import movie_recommender as core
+from flow import arun_flow
+
+
+async def agenerate_ai_response(text, session):
+    """Async counterpart of movie_recommender.generate_ai_response"""
+    with core.model_scheduler.priority(core.conversation_priority(session)):
+        return await arun_flow(core.response_flow(text, session))
+
+async def recommend(body):
+    data = json.loads(body or b"{}")
+    text = data.get('text', '')
+    session_id = data.get('session_id', '')
+
+    if not text or not session_id:
+        return json_response({'error': 'Missing text or session_id'}, 400)
+    try:
+        turn = core.parse_turn(data)
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+
+    # Session and cache reads and writes may hit SQLite, so they run in worker threads
+    session = await asyncio.to_thread(core.sessions.get_or_create, session_id)
+    if not session.begin_turn(turn):
+        return json_response(core.build_resync_payload(session), 409)
+    session.add_message(text, is_user=True)
+    ai_response_data = await agenerate_ai_response(text, session)
+    payload = await asyncio.to_thread(core.complete_turn, text, session, ai_response_data)
+    if payload is None:
+        session = await asyncio.to_thread(core.sessions.get_or_create, session_id)
+        return json_response(core.build_resync_payload(session), 409)
+
+    return json_response(payload)
+
+async def new_chat(body):
+    session = await asyncio.to_thread(core.sessions.create, str(uuid.uuid4()))
+    session_id = session.session_id
+    return json_response({
+        'session_id': session_id,
+        'message': 'New chat session started'
+    })
+
+async def health(body):
+    return json_response(await asyncio.to_thread(core.health_status))
+
+async def metrics_endpoint(body):
+    text = await asyncio.to_thread(core.metrics.render)
+    return 200, text.encode('utf-8'), 'text/plain; version=0.0.4'
+
+ROUTES = {
+    '/recommend': ('POST', recommend),
+    '/new-chat': ('POST', new_chat),
+    '/health': ('GET', health),
+    '/metrics': ('GET', metrics_endpoint),
+}
+
+# Same policy as flask_cors.CORS(app): any origin may call any route
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+]
+PREFLIGHT_HEADERS = CORS_HEADERS + [
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+    (b'access-control-allow-headers', b'Content-Type'),
+]
+
+def json_response(payload, status=200):
+    return status, json.dumps(payload).encode('utf-8'), 'application/json'
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    method = scope['method']
+    route = ROUTES.get(path)
+    if method == 'OPTIONS' and route is not None:
+        await respond(send, 204, b'', None, PREFLIGHT_HEADERS)
+        return
+    if route is None:
+        await respond(send, *json_response({'error': 'Not found'}, 404))
+        return
+    if method != route[0]:
+        await respond(send, *json_response({'error': 'Method not allowed'}, 405))
+        return
+
+    start = perf_counter()
+    body = await read_body(receive)
+    try:
+        response = await route[1](body)
+    except json.JSONDecodeError:
+        response = json_response({'error': 'Invalid JSON body'}, 400)
+    except Exception as e:
+        print(f"Error in {path} endpoint: {e}")
+        response = json_response({'error': str(e)}, 500)
+    core.REQUEST_SECONDS.labels(path).observe(perf_counter() - start)
+    await respond(send, *response)
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def respond(send, status, body, content_type, extra_headers=CORS_HEADERS):
+    headers = list(extra_headers)
+    headers.append((b'content-length', str(len(body)).encode('latin-1')))
+    if content_type:
+        headers.append((b'content-type', content_type.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, port=5000)
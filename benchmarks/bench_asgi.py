@@ -0,0 +1,135 @@
+"""Flask (thread per request) versus the asyncio ASGI app under the same fake model.
+
+Both apps run in-process against FakeBackend with identical latency. Each
+of --users virtual users sends /recommend turns back to back for --duration
+seconds; every turn has a distinct text so no two prompts are coalesced.
+Flask requests must first acquire one of --flask-threads worker slots (the
+threads a threaded server or gunicorn --threads would provide); ASGI
+requests are tasks on one event loop. Reports throughput and p50/p95 latency,
+queueing for a worker included.
+
+    python benchmarks/bench_asgi.py --users 256 --flask-threads 32 --latency-ms 500 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("PREFETCH_MIN_PREFERENCES", "0")
+
+import asgi_app  # noqa: E402
+import movie_recommender  # noqa: E402
+from llm_backend import FakeBackend, ResilientBackend  # noqa: E402
+
+
+def use_fake_backend(args, max_workers):
+    movie_recommender.llm_backend = ResilientBackend(
+        FakeBackend(mean_ms=args.latency_ms, spread_ms=args.latency_spread_ms,
+                    distribution=args.latency_distribution, seed=1),
+        deadline=30.0,
+        max_workers=max_workers,
+    )
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summarize(mode, latencies, errors, elapsed, **extra):
+    return dict(
+        mode=mode,
+        **extra,
+        turns=len(latencies),
+        errors=errors,
+        turns_per_s=round(len(latencies) / elapsed, 1),
+        p50_ms=round(percentile(latencies, 0.50) * 1000, 1),
+        p95_ms=round(percentile(latencies, 0.95) * 1000, 1),
+    )
+
+
+def run_flask(args):
+    # Let the server's thread count, not the model client's pool, be the limit
+    use_fake_backend(args, max_workers=args.users)
+    workers = threading.BoundedSemaphore(args.flask_threads)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def user(n):
+        client = movie_recommender.app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            i += 1
+            start = time.perf_counter()
+            with workers:
+                response = client.post("/recommend", json={
+                    "text": f"I like comedy movies ({n}-{i})", "session_id": f"flask-{n}"})
+            elapsed = time.perf_counter() - start
+            with lock:
+                (latencies if response.status_code == 200 else errors).append(elapsed)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(args.users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize("flask", latencies, len(errors), time.perf_counter() - start,
+                     users=args.users, worker_threads=args.flask_threads)
+
+
+async def asgi_post(path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi_app.app({"type": "http", "method": "POST", "path": path, "headers": []}, receive, send)
+    return sent[0]["status"]
+
+
+async def run_asgi_users(args):
+    use_fake_backend(args, max_workers=1)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+
+    async def user(n):
+        i = 0
+        while time.perf_counter() < deadline:
+            i += 1
+            start = time.perf_counter()
+            status = await asgi_post("/recommend", {
+                "text": f"I like comedy movies ({n}-{i})", "session_id": f"asgi-{n}"})
+            (latencies if status == 200 else errors).append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(n) for n in range(args.users)))
+    return summarize("asgi", latencies, len(errors), time.perf_counter() - start, users=args.users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=256)
+    parser.add_argument("--flask-threads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--latency-spread-ms", type=float, default=0)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    args = parser.parse_args()
+
+    results = [run_flask(args), asyncio.run(run_asgi_users(args))]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
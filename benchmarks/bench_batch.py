@@ -0,0 +1,103 @@
+"""Offline throughput of batch recommendations against a fake model.
+
+Compares calling recommend_for_preferences serially with recommend_batch
+for the same items, using a stand-in model that sleeps for a fixed latency.
+
+    python benchmarks/bench_batch.py --items 200 --unique 40 --latency-ms 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import movie_recommender  # noqa: E402
+
+GENRES = ["action", "comedy", "drama", "horror", "romance", "sci-fi", "thriller", "animation"]
+MOODS = ["happy", "sad", "excited", "relaxed", "funny", "serious"]
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Gemini stand-in that sleeps for a fixed latency and counts calls"""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_s)
+        return _Response(json.dumps({
+            "single_recommendation": "Inception (2010) - Stand-in pick",
+            "ten_recommendations": "Inception, Up, Heat, Alien, Rocky, Jaws, Coco, Big, Fargo, Seven"
+        }))
+
+
+def make_items(n_items, n_unique, seed=5):
+    rng = random.Random(seed)
+    pool = []
+    while len(pool) < n_unique:
+        preferences = {"genre": rng.choice(GENRES), "mood": rng.choice(MOODS), "year": str(rng.randint(1980, 2023))}
+        if preferences not in pool:
+            pool.append(preferences)
+    return [{"preferences": rng.choice(pool)} for _ in range(n_items)]
+
+
+def run(label, fn, items, model):
+    movie_recommender.recommendation_cache.clear()
+    start = time.perf_counter()
+    fn(items, model)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": label,
+        "items": len(items),
+        "model_calls": model.calls,
+        "elapsed_s": round(elapsed, 3),
+        "items_per_s": round(len(items) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--unique", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+
+    items = make_items(args.items, args.unique)
+    latency_s = args.latency_ms / 1000
+
+    def serial(batch, model):
+        for item in batch:
+            movie_recommender.recommend_for_preferences(item["preferences"], llm=model)
+
+    def batched(batch, model):
+        movie_recommender.recommend_batch(
+            batch, llm=model, max_workers=args.workers, max_in_flight=args.max_in_flight
+        )
+
+    # The cache would hide repeat items from the serial run, so it is cleared
+    # before each run and the serial baseline gets a fresh cache as it goes
+    results = []
+    if not args.skip_serial:
+        results.append(run("serial", serial, items, FakeModel(latency_s)))
+    results.append(run("batch", batched, items, FakeModel(latency_s)))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
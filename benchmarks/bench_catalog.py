@@ -0,0 +1,78 @@
+"""Top-k latency of the local catalog ranker on a synthetic catalog.
+
+    python benchmarks/bench_catalog.py --titles 100000 --queries 500
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalog_ranker import CatalogRanker  # noqa: E402
+
+GENRES = ["action", "comedy", "drama", "horror", "romance", "sci-fi", "thriller", "documentary",
+          "animation", "fantasy", "crime", "mystery", "adventure", "musical", "western", "war", "family"]
+MOODS = ["happy", "sad", "excited", "relaxed", "stressed", "romantic", "adventurous", "mysterious", "funny", "serious"]
+
+
+def synthetic_catalog(n_titles, n_actors, seed=11):
+    rng = random.Random(seed)
+    actors = ["actor %d" % i for i in range(n_actors)]
+    return CatalogRanker(
+        titles=["Movie %d" % i for i in range(n_titles)],
+        years=[rng.randint(1950, 2024) for _ in range(n_titles)],
+        genres=[rng.sample(GENRES, rng.randint(1, 3)) for _ in range(n_titles)],
+        moods=[rng.sample(MOODS, rng.randint(1, 3)) for _ in range(n_titles)],
+        actors=[rng.sample(actors, rng.randint(1, 4)) for _ in range(n_titles)],
+        popularity=[rng.random() * 100 for _ in range(n_titles)],
+    ), actors
+
+
+def random_preferences(rng, actors):
+    preferences = {"genre": rng.choice(GENRES), "mood": rng.choice(MOODS)}
+    if rng.random() < 0.5:
+        preferences["actors"] = rng.sample(actors, rng.randint(1, 2))
+    if rng.random() < 0.5:
+        preferences["year"] = str(rng.randint(1970, 2024))
+    return preferences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--actors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog, actors = synthetic_catalog(args.titles, args.actors)
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(3)
+    queries = [random_preferences(rng, actors) for _ in range(args.queries)]
+    catalog.recommend(queries[0], args.k)  # warm up
+
+    samples = []
+    for preferences in queries:
+        start = time.perf_counter()
+        catalog.recommend(preferences, args.k)
+        samples.append((time.perf_counter() - start) * 1e3)
+    samples.sort()
+
+    print(json.dumps({
+        "titles": len(catalog),
+        "k": args.k,
+        "build_s": round(build_s, 2),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
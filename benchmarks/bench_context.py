@@ -0,0 +1,88 @@
+"""Dynamic-prompt size and simulated model latency as a conversation grows.
+
+Plays a conversation of --turns turns through build_conversation_context and
+build_dynamic_prompt and reports, at checkpoints, the prompt size and the
+latency of a model whose time to first token grows with prompt length
+(--base-ms plus --per-1k-tokens-ms for every 1000 prompt tokens). The
+bounded context is compared with pasting the whole history into the prompt.
+
+    python benchmarks/bench_context.py --turns 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import movie_recommender  # noqa: E402
+from conversation_context import estimate_tokens  # noqa: E402
+from session_store import ConversationSession  # noqa: E402
+
+USER_LINES = [
+    "I'm in the mood for something funny tonight, maybe a comedy from the 90s",
+    "Not too long though, and I already saw Groundhog Day a couple of times",
+    "Do you have anything with Tom Hanks that is more lighthearted?",
+    "Something my kids could watch too would be great, they are eight and ten",
+]
+ASSISTANT_LINE = "Great choice! Are you looking for something recent, or are classics fine too?"
+
+
+def full_history_prompt(text, session):
+    """The unbounded alternative: every earlier message pasted into the prompt"""
+    context = movie_recommender.build_conversation_context(session)
+    context["summary"] = ""
+    context["recent_messages"] = [
+        ("User: " if is_user else "Assistant: ") + message
+        for message, is_user, _ in list(session.conversation_history)[:-1]
+    ]
+    return movie_recommender.build_dynamic_prompt(text, context)
+
+
+def simulated_latency_ms(prompt, args):
+    return args.base_ms + estimate_tokens(prompt) / 1000 * args.per_1k_tokens_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--base-ms", type=float, default=400)
+    parser.add_argument("--per-1k-tokens-ms", type=float, default=150)
+    parser.add_argument("--sleep", action="store_true", help="actually sleep for the simulated latency")
+    args = parser.parse_args()
+
+    # Full history needs an unbounded message list to be a fair comparison
+    ConversationSession.max_history = args.turns * 2 + 2
+    session = ConversationSession("bench")
+    checkpoints = {1, 10, 25, 50, 100, 150, args.turns}
+    results = []
+    for turn in range(1, args.turns + 1):
+        text = USER_LINES[turn % len(USER_LINES)]
+        session.add_message(text, is_user=True)
+
+        start = time.perf_counter()
+        prompt = movie_recommender.build_dynamic_prompt(text, movie_recommender.build_conversation_context(session))
+        build_us = (time.perf_counter() - start) * 1e6
+
+        if turn in checkpoints:
+            full = full_history_prompt(text, session)
+            latency_ms = simulated_latency_ms(prompt, args)
+            if args.sleep:
+                time.sleep(latency_ms / 1000)
+            results.append({
+                "turn": turn,
+                "bounded_tokens": estimate_tokens(prompt),
+                "bounded_model_ms": round(latency_ms),
+                "context_build_us": round(build_us, 1),
+                "full_history_tokens": estimate_tokens(full),
+                "full_history_model_ms": round(simulated_latency_ms(full, args)),
+            })
+
+        session.add_message(ASSISTANT_LINE, is_user=False)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
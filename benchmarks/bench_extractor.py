@@ -0,0 +1,102 @@
+"""Per-utterance cost of preference extraction as the vocabulary grows.
+
+Builds synthetic vocabularies from 30 to 50k entries, then times the
+compiled single-pass extractor against the original linear keyword scan.
+
+    python benchmarks/bench_extractor.py --sizes 30 300 3000 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from preference_extractor import PreferenceExtractor  # noqa: E402
+
+UTTERANCES = [
+    "I want something funny tonight, maybe a comedy or an animated movie",
+    "I'm feeling a bit sad, show me a drama with Meryl Streep from 1994",
+    "Any sci fi like Inception or Interstellar? I love Christopher Nolan",
+    "My kids want a cartoon and I want something relaxing",
+    "Give me a thriller, I'm in the mood for something dark and serious",
+    "Tom Hanks and Leonardo DiCaprio are my favourite actors",
+]
+
+SYLLABLES = ["ka", "lo", "ri", "men", "sta", "vor", "el", "quin", "dra", "zu", "bel", "tor", "an", "is", "pe", "wyn"]
+
+
+def synthetic_vocabulary(size, seed=7):
+    """The real vocabulary's shape padded with random multi-word names"""
+    rng = random.Random(seed)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "vocabulary.json")) as f:
+        base = json.load(f)
+
+    vocabulary = {category: dict(list(entries.items())) for category, entries in base.items()}
+    count = sum(1 + len(synonyms) for entries in vocabulary.values() for synonyms in entries.values())
+    if size <= count:
+        # Trim down to roughly `size` surface forms for the small end of the sweep
+        flat = [(category, name) for category, entries in vocabulary.items() for name in entries]
+        rng.shuffle(flat)
+        vocabulary = {category: {} for category in base}
+        for category, name in flat[:size]:
+            vocabulary[category][name] = []
+        return vocabulary
+
+    categories = ["actor", "director", "title"]
+    while count < size:
+        words = [
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        name = " ".join(words)
+        entries = vocabulary[rng.choice(categories)]
+        if name not in entries:
+            entries[name] = []
+            count += 1
+    return vocabulary
+
+
+def linear_scan(vocabulary, text):
+    """The original approach: one substring scan per vocabulary entry"""
+    text_lower = text.lower()
+    return [name for entries in vocabulary.values() for name in entries if name.lower() in text_lower]
+
+
+def time_per_utterance(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for utterance in UTTERANCES:
+            fn(utterance)
+    return (time.perf_counter() - start) / (rounds * len(UTTERANCES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 300, 3000, 50000])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        vocabulary = synthetic_vocabulary(size)
+        start = time.perf_counter()
+        extractor = PreferenceExtractor(vocabulary)
+        compile_ms = (time.perf_counter() - start) * 1e3
+
+        linear_rounds = max(1, args.rounds * 30 // max(size, 30))
+        results.append({
+            "vocabulary_size": extractor.size,
+            "compile_ms": round(compile_ms, 1),
+            "extractor_us_per_utterance": round(time_per_utterance(extractor.extract, args.rounds), 2),
+            "linear_scan_us_per_utterance": round(
+                time_per_utterance(lambda text: linear_scan(vocabulary, text), linear_rounds), 2
+            ),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
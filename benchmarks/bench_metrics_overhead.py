@@ -0,0 +1,83 @@
+"""Overhead of the stage timing and counters used on the request path.
+
+The request path times each stage with a perf_counter() pair and one
+histogram observe(); the `with histogram.time()` span is measured alongside
+for comparison.
+
+    python benchmarks/bench_metrics_overhead.py --iterations 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from time import perf_counter  # noqa: E402
+
+from metrics import MetricsRegistry  # noqa: E402
+
+# A /recommend turn times four stages (analyze, prompt, model, parse) plus
+# the request itself
+TIMINGS_PER_REQUEST = 5
+
+
+def per_call_ns(fn, iterations):
+    start = time.perf_counter_ns()
+    fn(iterations)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    stage = registry.histogram("stage_seconds", "Stage latency", ["stage"]).labels("model")
+    counter = registry.counter("fallbacks_total", "Fallbacks", ["path"]).labels("dynamic")
+
+    def empty_loop(n):
+        for _ in range(n):
+            pass
+
+    def timings(n):
+        for _ in range(n):
+            start = perf_counter()
+            stage.observe(perf_counter() - start)
+
+    def spans(n):
+        for _ in range(n):
+            with stage.time():
+                pass
+
+    def observes(n):
+        for _ in range(n):
+            stage.observe(0.003)
+
+    def increments(n):
+        for _ in range(n):
+            counter.inc()
+
+    baseline = per_call_ns(empty_loop, args.iterations)
+    timing_ns = per_call_ns(timings, args.iterations) - baseline
+    span_ns = per_call_ns(spans, args.iterations) - baseline
+    observe_ns = per_call_ns(observes, args.iterations) - baseline
+    render_start = time.perf_counter()
+    registry.render()
+    render_us = (time.perf_counter() - render_start) * 1e6
+
+    print(json.dumps({
+        "iterations": args.iterations,
+        "timing_ns": round(timing_ns, 1),
+        "observe_ns": round(observe_ns, 1),
+        "span_ns": round(span_ns, 1),
+        "counter_inc_ns": round(per_call_ns(increments, args.iterations) - baseline, 1),
+        "estimated_per_request_us": round(timing_ns * TIMINGS_PER_REQUEST / 1000, 2),
+        "render_us": round(render_us, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
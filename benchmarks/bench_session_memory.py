@@ -0,0 +1,96 @@
+"""Memory footprint of live chat sessions.
+
+Creates N sessions with a short conversation each and reports the traced
+allocation per session for the compact session store and for the original
+dict-of-dicts layout.
+
+    python benchmarks/bench_session_memory.py --sessions 100000 --messages 6
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from session_store import SessionStore  # noqa: E402
+
+
+class LegacySession:
+    """The session layout used before the compact store, kept for comparison"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.conversation_history = []
+        self.user_preferences = {}
+        self.conversation_stage = "initial"
+        self.questions_asked = []
+
+    def add_message(self, text, is_user=True):
+        self.conversation_history.append({
+            "text": text,
+            "is_user": is_user,
+            "timestamp": datetime.now().isoformat()
+        })
+
+
+def fill(store_add, n_sessions, n_messages):
+    texts = ["I like comedy movies", "Something happy please"]
+    for i in range(n_sessions):
+        session = store_add("session-%08d" % i)
+        for m in range(n_messages):
+            session.add_message(texts[m % 2], is_user=m % 2 == 0)
+        session.user_preferences["genre"] = "comedy"
+
+
+def measure(label, n_sessions, n_messages, build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    store = build(n_sessions, n_messages)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del store
+    return {
+        "layout": label,
+        "sessions": n_sessions,
+        "messages_per_session": n_messages,
+        "total_mb": round(total / 1e6, 2),
+        "bytes_per_session": round(total / n_sessions),
+    }
+
+
+def build_compact(n_sessions, n_messages):
+    store = SessionStore(max_sessions=n_sessions, idle_ttl_seconds=3600)
+    fill(store.create, n_sessions, n_messages)
+    return store
+
+
+def build_legacy(n_sessions, n_messages):
+    store = {}
+
+    def add(session_id):
+        store[session_id] = LegacySession(session_id)
+        return store[session_id]
+
+    fill(add, n_sessions, n_messages)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--messages", type=int, default=6)
+    args = parser.parse_args()
+
+    results = [
+        measure("legacy", args.sessions, args.messages, build_legacy),
+        measure("compact", args.sessions, args.messages, build_compact),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
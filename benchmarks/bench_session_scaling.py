@@ -0,0 +1,102 @@
+"""Throughput of the shared SQLite session store as worker processes are added.
+
+Each worker process plays conversation turns against its own connection to
+one shared database, following the /recommend path: load the session,
+accept the turn, append a user and an assistant message, update
+preferences, burn --work-us of CPU for the rest of the request, and save.
+A save that loses the compare-and-swap to another worker is counted as a
+conflict, not a turn. Reports completed turns per second and conflicts for
+each worker count, with the in-memory store in a single process as the
+reference.
+
+    python benchmarks/bench_session_scaling.py --workers 1 2 4 8 --duration 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from session_store import SessionStore, SQLiteSessionStore  # noqa: E402
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def play(store, session_ids, duration, work_s, seed):
+    """Return (completed turns, conflicting saves)"""
+    rng = random.Random(seed)
+    turns = conflicts = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        session = store.get_or_create(rng.choice(session_ids))
+        # A client in sync sends the turn after the stored one
+        if not session.begin_turn(session.turn + 1):
+            raise AssertionError("a freshly loaded session rejected the next turn")
+        session.add_message("I like comedy movies", is_user=True)
+        session.update_preferences({"genre": "comedy"})
+        busy_wait(work_s)
+        session.add_message("Great! What mood are you in today?", is_user=False)
+        if store.save(session):
+            turns += 1
+        else:
+            conflicts += 1
+    return turns, conflicts
+
+
+def worker(path, session_ids, duration, work_s, seed, start, results):
+    store = SQLiteSessionStore(path, max_sessions=len(session_ids) * 2)
+    start.wait()
+    results.put(play(store, session_ids, duration, work_s, seed))
+
+
+def run_sqlite(n_workers, session_ids, duration, work_s):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        SQLiteSessionStore(path)
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=worker, args=(path, session_ids, duration, work_s, seed, start, results))
+            for seed in range(n_workers)
+        ]
+        for proc in procs:
+            proc.start()
+        start.set()
+        outcomes = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    return sum(turns for turns, _ in outcomes), sum(conflicts for _, conflicts in outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--work-us", type=float, default=500, help="CPU time spent per turn outside the store")
+    args = parser.parse_args()
+
+    session_ids = ["session-%06d" % i for i in range(args.sessions)]
+    work_s = args.work_us / 1e6
+
+    memory_turns, memory_conflicts = play(SessionStore(), session_ids, args.duration, work_s, 0)
+    results = [{"store": "memory", "workers": 1, "turns_per_s": round(memory_turns / args.duration),
+                "conflicts": memory_conflicts}]
+    for n_workers in args.workers:
+        turns, conflicts = run_sqlite(n_workers, session_ids, args.duration, work_s)
+        results.append({"store": "sqlite", "workers": n_workers, "turns_per_s": round(turns / args.duration),
+                        "conflicts": conflicts})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Load test that replays multi-turn conversations against the Flask service.
+
+Each virtual user repeatedly picks a transcript, opens a session with
+/new-chat and sends every turn to /recommend. Latency is recorded per
+endpoint and the run is summarized as JSON (throughput, p50/p95/p99, error
+counts and session-store growth) so runs can be compared. In in-process
+mode, session memory is measured afterwards in a separate untimed pass, so
+allocation tracing never slows the timed requests.
+
+In-process mode drives the Flask test client with a fake model whose latency
+follows a configurable distribution:
+
+    python benchmarks/load_test.py --users 16 --duration 30 --latency-ms 400 \\
+        --latency-spread-ms 200 --latency-distribution lognormal --output run.json
+
+Socket mode drives a running server over HTTP. Configure the server's model
+latency with llm_stub_server.py:
+
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --users 16 --duration 30
+
+Pass --baseline to fail (exit status 1) when p95 latency regresses:
+
+    python benchmarks/load_test.py ... --baseline run.json --max-regression 0.10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+DEFAULT_TRANSCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcripts.jsonl")
+
+
+def load_transcripts(path):
+    """Read conversations from a JSON-lines file.
+
+    Each line is an object with a "turns" list of user utterances. Lines with
+    only "text", or "title"/"body" fields, are replayed as the corresponding
+    one- or two-turn conversation.
+    """
+    transcripts = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            turns = record.get("turns")
+            if turns is None:
+                turns = [record[key] for key in ("text", "title", "body") if record.get(key)]
+            if not turns:
+                raise ValueError(f"{path}:{line_number}: no turns found")
+            transcripts.append([str(turn) for turn in turns])
+    return transcripts
+
+
+class InProcessClient:
+    """Flask test client with the model replaced by a fake-latency backend"""
+
+    def __init__(self, args):
+        import movie_recommender
+        from llm_backend import FakeBackend, ResilientBackend
+        from scheduler import ScheduledBackend
+
+        # Keep the service's scheduler so LLM_RATE_LIMIT and friends apply to the fake model too
+        movie_recommender.llm_backend = ScheduledBackend(ResilientBackend(
+            FakeBackend(
+                mean_ms=args.latency_ms,
+                spread_ms=args.latency_spread_ms,
+                distribution=args.latency_distribution,
+                error_rate=args.error_rate,
+                seed=args.seed,
+            ),
+            deadline=float(os.environ.get("LLM_TIMEOUT", 10)),
+        ), movie_recommender.model_scheduler)
+        self.app = movie_recommender
+        self.client = movie_recommender.app.test_client()
+
+    def post(self, path, payload):
+        response = self.client.post(path, json=payload)
+        return response.status_code, response.get_json()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_json()
+
+    def session_count(self):
+        return len(self.app.sessions)
+
+    def measure_session_memory(self, transcripts, conversations, rng):
+        """Traced memory growth while replaying `conversations` conversations against an instant model"""
+        from llm_backend import FakeBackend
+
+        timed_backend = self.app.llm_backend
+        self.app.llm_backend = FakeBackend(mean_ms=0)
+        sessions_before = self.session_count()
+        tracemalloc.start()
+        try:
+            memory_before = tracemalloc.get_traced_memory()[0]
+            for _ in range(conversations):
+                status, body = self.post("/new-chat", {})
+                if status != 200:
+                    continue
+                for text in rng.choice(transcripts):
+                    self.post("/recommend", {"text": text, "session_id": body["session_id"]})
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            self.app.llm_backend = timed_backend
+        grown = self.session_count() - sessions_before
+        return {
+            "memory_pass_conversations": conversations,
+            "traced_growth_mb": round((memory_after - memory_before) / 1e6, 3),
+            "traced_peak_mb": round(memory_peak / 1e6, 3),
+            "bytes_per_new_session": round((memory_after - memory_before) / grown) if grown else None,
+        }
+
+
+class SocketClient:
+    """Plain HTTP client for a running server"""
+
+    def __init__(self, url, timeout=60):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def post(self, path, payload):
+        return self._request(path, payload)
+
+    def get(self, path):
+        return self._request(path)
+
+    def session_count(self):
+        status, body = self.get("/health")
+        return body.get("active_sessions") if status == 200 and body else None
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, elapsed_s, ok):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(elapsed_s)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def timed(recorder, endpoint, call):
+    start = time.perf_counter()
+    try:
+        status, body = call()
+        ok = status == 200
+    except Exception:
+        status, body, ok = None, None, False
+    recorder.record(endpoint, time.perf_counter() - start, ok)
+    return body if ok else None
+
+
+def virtual_user(client, transcripts, recorder, stop_at, max_conversations, rng, counter):
+    while time.monotonic() < stop_at:
+        with counter["lock"]:
+            if max_conversations and counter["started"] >= max_conversations:
+                return
+            counter["started"] += 1
+
+        body = timed(recorder, "/new-chat", lambda: client.post("/new-chat", {}))
+        if not body:
+            continue
+        session_id = body["session_id"]
+        for text in rng.choice(transcripts):
+            payload = {"text": text, "session_id": session_id}
+            timed(recorder, "/recommend", lambda: client.post("/recommend", payload))
+
+
+def summarize(recorder, elapsed_s):
+    endpoints = {}
+    total = 0
+    for endpoint, samples in sorted(recorder.samples.items()):
+        samples = sorted(samples)
+        total += len(samples)
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "errors": recorder.errors.get(endpoint, 0),
+            "throughput_rps": round(len(samples) / elapsed_s, 2),
+            "mean_ms": round(sum(samples) / len(samples) * 1e3, 2),
+            "p50_ms": round(percentile(samples, 0.50) * 1e3, 2),
+            "p95_ms": round(percentile(samples, 0.95) * 1e3, 2),
+            "p99_ms": round(percentile(samples, 0.99) * 1e3, 2),
+            "max_ms": round(samples[-1] * 1e3, 2),
+        }
+    return {"requests": total, "throughput_rps": round(total / elapsed_s, 2), "endpoints": endpoints}
+
+
+def compare(result, baseline, max_regression):
+    """Return a list of endpoints whose p95 regressed beyond max_regression"""
+    regressions = []
+    for endpoint, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        change = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"]
+        if change > max_regression:
+            regressions.append({
+                "endpoint": endpoint,
+                "baseline_p95_ms": previous["p95_ms"],
+                "p95_ms": current["p95_ms"],
+                "change": round(change, 4),
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transcripts", default=DEFAULT_TRANSCRIPTS, help="JSON-lines file of conversations")
+    parser.add_argument("--url", help="drive a running server over HTTP instead of the in-process test client")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--conversations", type=int, default=0, help="stop after this many conversations (0 = no limit)")
+    parser.add_argument("--latency-ms", type=float, default=300, help="fake model median latency (in-process)")
+    parser.add_argument("--latency-spread-ms", type=float, default=0)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake model failure rate (in-process)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p95 latency against")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    parser.add_argument("--memory-conversations", type=int, default=200,
+                        help="conversations replayed in the untimed memory pass (in-process; 0 skips it)")
+    args = parser.parse_args()
+
+    transcripts = load_transcripts(args.transcripts)
+    in_process = not args.url
+    client = InProcessClient(args) if in_process else SocketClient(args.url)
+    sessions_before = client.session_count()
+
+    recorder = Recorder()
+    counter = {"started": 0, "lock": threading.Lock()}
+    start = time.monotonic()
+    stop_at = start + args.duration
+    threads = [
+        threading.Thread(
+            target=virtual_user,
+            args=(client, transcripts, recorder, stop_at, args.conversations, random.Random(args.seed + i), counter),
+            daemon=True,
+        )
+        for i in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    result = {
+        "config": {
+            "mode": "in-process" if in_process else "socket",
+            "url": args.url,
+            "users": args.users,
+            "duration_s": args.duration,
+            "transcripts": os.path.basename(args.transcripts),
+            "fake_model": None if not in_process else {
+                "latency_ms": args.latency_ms,
+                "spread_ms": args.latency_spread_ms,
+                "distribution": args.latency_distribution,
+                "error_rate": args.error_rate,
+            },
+        },
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - elapsed)),
+        "elapsed_s": round(elapsed, 3),
+        "conversations": counter["started"],
+    }
+    result.update(summarize(recorder, elapsed))
+
+    sessions_after = client.session_count()
+    result["session_store"] = {"sessions_before": sessions_before, "sessions_after": sessions_after}
+    if in_process and args.memory_conversations:
+        result["session_store"].update(
+            client.measure_session_memory(transcripts, args.memory_conversations, random.Random(args.seed))
+        )
+
+    exit_status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+        result["regressions"] = regressions
+        exit_status = 1 if regressions else 0
+
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    print(report)
+    sys.exit(exit_status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import csv
+import os
+
+import numpy as np
+
+
+# Relative weight of each signal in a candidate's score
+GENRE_WEIGHT = 3.0
+MOOD_WEIGHT = 2.0
+ACTOR_WEIGHT = 2.5
+YEAR_WEIGHT = 1.0
+POPULARITY_WEIGHT = 1.0
+
+# A film this many years away from the preferred year gets no year credit
+YEAR_WINDOW = 15.0
+
+
+class CatalogRanker:
+    """Local movie ranking over an array-backed catalog.
+
+    Each title is a row in a set of feature arrays: multi-hot genre and mood
+    matrices, release year, padded actor IDs and normalized popularity.
+    Scoring a preference set is a handful of vectorized operations over the
+    whole catalog followed by an argpartition for the top k.
+    """
+
+    def __init__(self, titles, years, genres, moods, actors, popularity):
+        self.titles = list(titles)
+        n = len(self.titles)
+
+        self.genre_index = _vocabulary_index(genres)
+        self.mood_index = _vocabulary_index(moods)
+        self.actor_index = _vocabulary_index(actors)
+
+        # Column-major so selecting the columns for a preference reads contiguous memory
+        self.genre_matrix = _multi_hot(genres, self.genre_index, n)
+        self.mood_matrix = _multi_hot(moods, self.mood_index, n)
+
+        width = max((len(row) for row in actors), default=0) or 1
+        # -1 pads rows with fewer actors
+        self.actor_ids = np.full((n, width), -1, dtype=np.int32)
+        for i, row in enumerate(actors):
+            for j, actor in enumerate(row):
+                self.actor_ids[i, j] = self.actor_index[actor]
+
+        # Inverted index from actor ID to catalog rows, stored CSR-style
+        flat = self.actor_ids.ravel()
+        present = flat >= 0
+        order = np.argsort(flat[present], kind="stable")
+        self.actor_rows = (np.nonzero(present)[0] // width)[order].astype(np.int32)
+        self.actor_offsets = np.zeros(len(self.actor_index) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(flat[present], minlength=len(self.actor_index)), out=self.actor_offsets[1:])
+
+        self.years = np.asarray([year or 0 for year in years], dtype=np.float32)
+        self.has_year = self.years > 0
+
+        popularity = np.asarray(popularity, dtype=np.float32)
+        span = float(popularity.max() - popularity.min()) if n else 0.0
+        self.popularity = (popularity - popularity.min()) / span if span else np.zeros(n, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.titles)
+
+    @classmethod
+    def load(cls, path):
+        """Load a catalog from a .csv or .parquet file"""
+        if os.path.splitext(path)[1].lower() == ".parquet":
+            return cls.from_parquet(path)
+        return cls.from_csv(path)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Load a CSV with title, year, genres, moods, actors and popularity columns.
+
+        List columns are pipe-separated, e.g. ``comedy|romance``.
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls.from_records(csv.DictReader(f))
+
+    @classmethod
+    def from_parquet(cls, path):
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("Loading a Parquet catalog requires pandas and pyarrow") from e
+        return cls.from_records(pd.read_parquet(path).to_dict("records"))
+
+    @classmethod
+    def from_records(cls, records):
+        titles, years, genres, moods, actors, popularity = [], [], [], [], [], []
+        for record in records:
+            titles.append(record["title"])
+            years.append(int(record["year"]) if str(record.get("year") or "").strip() else 0)
+            genres.append(_split(record.get("genres")))
+            moods.append(_split(record.get("moods")))
+            actors.append(_split(record.get("actors")))
+            popularity.append(float(record.get("popularity") or 0))
+        return cls(titles, years, genres, moods, actors, popularity)
+
+    def score(self, preferences):
+        """Score every title in the catalog for a preference set"""
+        scores = POPULARITY_WEIGHT * self.popularity
+
+        genres = self._positions(preferences, "genre", "genres", self.genre_index)
+        if genres:
+            scores += GENRE_WEIGHT * self.genre_matrix[:, genres].sum(axis=1)
+
+        moods = self._positions(preferences, "mood", "moods", self.mood_index)
+        if moods:
+            scores += MOOD_WEIGHT * self.mood_matrix[:, moods].sum(axis=1)
+
+        actor_ids = [self.actor_index[a] for a in _as_list(preferences.get("actors")) if a in self.actor_index]
+        if actor_ids:
+            rows = np.concatenate([
+                self.actor_rows[self.actor_offsets[actor_id]:self.actor_offsets[actor_id + 1]]
+                for actor_id in actor_ids
+            ])
+            # A title credited with several preferred actors is only boosted once
+            scores[np.unique(rows)] += ACTOR_WEIGHT
+
+        year = str(preferences.get("year") or "")
+        if year.isdigit():
+            closeness = np.abs(self.years - np.float32(year))
+            closeness *= np.float32(1.0 / YEAR_WINDOW)
+            np.minimum(closeness, 1.0, out=closeness)
+            closeness *= np.float32(-YEAR_WEIGHT)
+            closeness += np.float32(YEAR_WEIGHT)
+            closeness[~self.has_year] = 0.0
+            scores += closeness
+
+        return scores
+
+    def top_k(self, preferences, k=10):
+        """Return catalog row indices of the k best titles, best first"""
+        scores = self.score(preferences)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def recommend(self, preferences, k=10):
+        """Return recommendations in the same shape as the model's final-recommendation JSON"""
+        indices = self.top_k(preferences, k)
+        if len(indices) == 0:
+            return None
+
+        best = int(indices[0])
+        genre = preferences.get("genre")
+        mood = preferences.get("mood")
+        if genre and mood:
+            reason = f"A {genre} pick for a {mood} mood"
+        elif genre:
+            reason = f"A highly rated {genre} pick"
+        elif mood:
+            reason = f"A highly rated pick for a {mood} mood"
+        else:
+            reason = "A highly rated crowd favourite"
+
+        return {
+            "single_recommendation": f"{self._label(best)} - {reason}",
+            "ten_recommendations": ", ".join(self.titles[int(i)] for i in indices)
+        }
+
+    def _label(self, index):
+        year = int(self.years[index])
+        return f"{self.titles[index]} ({year})" if year else self.titles[index]
+
+    def _positions(self, preferences, single_key, list_key, index):
+        values = _as_list(preferences.get(list_key)) or _as_list(preferences.get(single_key))
+        return [index[v] for v in dict.fromkeys(values) if v in index]
+
+
+def _split(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip().lower() for part in value.split("|") if part.strip()]
+    return [str(part).strip().lower() for part in value]
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value.lower()]
+    return [str(v).lower() for v in value]
+
+
+def _vocabulary_index(rows):
+    index = {}
+    for row in rows:
+        for value in row:
+            index.setdefault(value, len(index))
+    return index
+
+
+def _multi_hot(rows, index, n):
+    matrix = np.zeros((n, max(len(index), 1)), dtype=np.float32, order="F")
+    for i, row in enumerate(rows):
+        for value in row:
+            matrix[i, index[value]] = 1.0
+    return matrix
@@ -0,0 +1,218 @@
+import re
+
+
+# What the user has ruled out: "hated horror", "no gore", "already saw Groundhog Day"
+RULED_OUT_PATTERN = re.compile(
+    r"\b(?:(?:hate[ds]?|dislike[ds]?|can'?t stand|cannot stand|(?:do|did)n'?t (?:like|want|enjoy)"
+    r"|do not (?:like|want)|not into|not a fan of|no more|avoid|skip|without)"
+    r"|(?:already|just) (?:saw|seen|watched)|no)\s+([^.,;:!?()]+)",
+    re.IGNORECASE,
+)
+# "no" phrases that rule nothing out
+NOT_RULED_OUT = {"idea", "problem", "preference", "preferences", "worries", "thanks", "clue", "one", "matter", "way"}
+# A title with its year, as the assistant suggests them: "Up (2009)", "The Grand Budapest Hotel (2014)"
+SUGGESTED_TITLE_PATTERN = re.compile(
+    r"\b((?:[A-Z0-9][\w'&:!.-]*)(?:\s+(?:[A-Z0-9][\w'&:!.-]*|of|the|a|an|and|in|on|at|to|for|from|with)){0,8})\s*\((\d{4})\)"
+)
+# Capitalized words that start a sentence rather than a title: "Also Up (2009)"
+NOT_TITLE_WORDS = {"also", "and", "or", "try", "maybe", "perhaps", "consider", "watch", "how", "about", "then", "i", "you", "we", "like", "plus"}
+# The user revising an earlier preference: "actually, make it a comedy instead"
+PREFERENCE_CHANGE_PATTERN = re.compile(
+    r"\b(?:actually|instead|rather|changed my mind|change of plans?|switch(?:ing)? to|not anymore|on second thought)\b",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text):
+    """Rough token count used for budgeting (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def clip(text, limit):
+    """Collapse whitespace and cut text to at most `limit` characters"""
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def format_message(text, is_user, limit):
+    return ("User: " if is_user else "Assistant: ") + clip(text, limit)
+
+
+class ConversationSummary:
+    """Rolling summary of the messages that have left the verbatim window.
+
+    Each folded message becomes one clipped line. Once the lines exceed the
+    token budget the oldest are dropped and only counted, so folding costs
+    O(1) amortized per message and the rendered summary stays within budget.
+
+    Dropped lines would take decisions with them, so folding also keeps a
+    digest: what the user ruled out, titles the assistant already suggested,
+    and the user's preference changes. The digest is rendered ahead of the
+    lines and outlives them. Lines are dropped first; only when the digest
+    alone exceeds the budget are its oldest entries trimmed, suggested titles
+    before preference changes before what the user ruled out. `tokens`
+    counts everything render() returns.
+    """
+
+    __slots__ = ("lines", "omitted", "folded", "tokens", "line_tokens", "ruled_out", "suggested", "changes", "digest_tokens")
+
+    line_chars = 100
+    phrase_chars = 40
+    change_chars = 80
+    max_ruled_out = 10
+    max_suggested = 12
+    max_changes = 3
+
+    def __init__(self, lines=(), omitted=0, folded=0, digest=((), (), ())):
+        self.lines = list(lines)
+        self.omitted = omitted
+        self.folded = folded  # messages (by absolute index) already folded or skipped
+        ruled_out, suggested, changes = digest
+        self.ruled_out = list(ruled_out)
+        self.suggested = list(suggested)
+        self.changes = list(changes)
+        self.line_tokens = sum(estimate_tokens(line) + 1 for line in self.lines)
+        self.digest_tokens = self._digest_cost()
+        self.tokens = self._total()
+
+    def fold(self, text, is_user, budget_tokens):
+        if self._digest(text, is_user):
+            self.digest_tokens = self._digest_cost()
+        line = format_message(text, is_user, self.line_chars)
+        self.lines.append(line)
+        self.line_tokens += estimate_tokens(line) + 1
+        while self.lines and self._total() > budget_tokens:
+            dropped = self.lines.pop(0)
+            self.line_tokens -= estimate_tokens(dropped) + 1
+            self.omitted += 1
+        while self._total() > budget_tokens and self._trim_digest():
+            self.digest_tokens = self._digest_cost()
+        self.tokens = self._total()
+
+    def _total(self):
+        omitted_tokens = estimate_tokens(self._omitted_line()) + 1 if self.omitted else 0
+        return self.digest_tokens + omitted_tokens + self.line_tokens
+
+    def _digest_cost(self):
+        return sum(estimate_tokens(line) + 1 for line in self.digest_lines())
+
+    def _trim_digest(self):
+        """Drop the oldest entry of the least important non-empty digest list; False if all are empty"""
+        for entries in (self.suggested, self.changes, self.ruled_out):
+            if entries:
+                del entries[0]
+                return True
+        return False
+
+    def _digest(self, text, is_user):
+        """Add what `text` rules out, suggests or changes to the digest; True if it changed"""
+        changed = False
+        if is_user:
+            for match in RULED_OUT_PATTERN.finditer(text):
+                if match.group(1).split()[0].lower() in NOT_RULED_OUT:
+                    continue
+                changed |= _remember(self.ruled_out, clip(match.group(0), self.phrase_chars), self.max_ruled_out)
+            if PREFERENCE_CHANGE_PATTERN.search(text):
+                changed |= _remember(self.changes, clip(text, self.change_chars), self.max_changes)
+        else:
+            for match in SUGGESTED_TITLE_PATTERN.finditer(text):
+                words = match.group(1).split()
+                while len(words) > 1 and words[0].lower() in NOT_TITLE_WORDS:
+                    del words[0]
+                title = clip(f"{' '.join(words)} ({match.group(2)})", self.phrase_chars)
+                changed |= _remember(self.suggested, title, self.max_suggested)
+        return changed
+
+    def digest_lines(self):
+        lines = []
+        if self.ruled_out:
+            lines.append("User ruled out: " + "; ".join(self.ruled_out))
+        if self.suggested:
+            lines.append("Already suggested: " + "; ".join(self.suggested))
+        if self.changes:
+            lines.append("User changed preferences: " + " / ".join(self.changes))
+        return lines
+
+    def render(self):
+        lines = self.digest_lines()
+        if self.omitted:
+            lines.append(self._omitted_line())
+        lines.extend(self.lines)
+        return "\n".join(lines)
+
+    def _omitted_line(self):
+        return f"({self.omitted} earlier messages omitted)"
+
+    def to_list(self):
+        return [self.lines, self.omitted, self.folded, [self.ruled_out, self.suggested, self.changes]]
+
+    @classmethod
+    def from_list(cls, data):
+        # Summaries saved before the digest existed have three fields
+        lines, omitted, folded, *rest = data
+        return cls(lines, omitted, folded, rest[0] if rest else ((), (), ()))
+
+
+def _remember(entries, entry, limit):
+    """Append `entry` unless already present, dropping the oldest past `limit`; True if added"""
+    if entry in entries:
+        return False
+    entries.append(entry)
+    if len(entries) > limit:
+        del entries[0]
+    return True
+
+
+class ContextBuilder:
+    """Bounded conversation context for the dynamic prompt.
+
+    The last `recent_turns` turns are kept verbatim (each message clipped to
+    `message_chars`); older messages are folded into the session's rolling
+    summary as they leave that window. The summary gets a third of
+    `token_budget` and the verbatim messages the rest, so the prompt stops
+    growing however long the conversation runs.
+    """
+
+    def __init__(self, recent_turns=3, token_budget=600, message_chars=240):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_budget = token_budget // 3
+        self.message_chars = message_chars
+
+    def update(self, session):
+        """Fold messages that have left the verbatim window into session.summary.
+
+        The newest message is the input being answered, so the window is the
+        `recent_turns` turns before it.
+        """
+        boundary = session.message_count - 1 - 2 * self.recent_turns
+        summary = session.summary
+        if boundary <= (summary.folded if summary is not None else 0):
+            return summary
+        if summary is None:
+            summary = session.summary = ConversationSummary()
+
+        history = session.conversation_history
+        first = session.message_count - len(history)  # absolute index of the oldest message still held
+        for index in range(max(summary.folded, first), boundary):
+            text, is_user, _ = history[index - first]
+            summary.fold(text, is_user, self.summary_budget)
+        summary.folded = boundary
+        return summary
+
+    def recent_messages(self, session, summary=None):
+        """Formatted lines for the verbatim window, oldest first, within the remaining budget"""
+        budget = self.token_budget - (summary.tokens if summary is not None else 0)
+        history = session.conversation_history
+        start = max(0, len(history) - 1 - 2 * self.recent_turns)
+        lines = []
+        for index in range(len(history) - 2, start - 1, -1):
+            text, is_user, _ = history[index]
+            line = format_message(text, is_user, self.message_chars)
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                break
+            budget -= cost
+            lines.append(line)
+        lines.reverse()
+        return lines
@@ -0,0 +1,63 @@
+"""Response flows shared by the Flask app and the asyncio app.
+
+A flow is a generator. It yields a Step each time it must wait on I/O: a
+model call, a pending prefetch, or the disk-backed cache. The driver sends
+back the step's result or throws its exception into the flow. run_flow makes
+each step in the calling thread, and arun_flow awaits it. The decisions in
+between, fallbacks included, are therefore written once.
+"""
+import asyncio
+
+
+class Step:
+    """Something a flow waits on: run() blocks, arun() awaits"""
+
+    def run(self):
+        raise NotImplementedError
+
+    async def arun(self):
+        raise NotImplementedError
+
+
+class Blocking(Step):
+    """A blocking call: made inline by run_flow, in a worker thread by arun_flow"""
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def run(self):
+        return self.fn(*self.args)
+
+    async def arun(self):
+        return await asyncio.to_thread(self.fn, *self.args)
+
+
+def run_flow(flow):
+    """Run a flow to completion in this thread and return its result"""
+    result, error = None, None
+    while True:
+        try:
+            step = flow.send(result) if error is None else flow.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            result, error = step.run(), None
+        except Exception as e:
+            result, error = None, e
+
+
+async def arun_flow(flow):
+    """Run a flow to completion on the event loop and return its result"""
+    result, error = None, None
+    while True:
+        try:
+            step = flow.send(result) if error is None else flow.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            result, error = await step.arun(), None
+        except Exception as e:
+            result, error = None, e
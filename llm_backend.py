@@ -0,0 +1,420 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class BackendError(Exception):
+    """Base class for errors raised by an LLM backend"""
+
+
+class DeadlineExceeded(BackendError, TimeoutError):
+    """The backend did not answer within the per-call deadline"""
+
+
+class CircuitOpenError(BackendError):
+    """The circuit breaker is open, so the call was not attempted"""
+
+
+class LLMBackend:
+    """Interface for text-generation backends.
+
+    generate() returns the full completion text; stream() yields text chunks.
+    agenerate() is the coroutine form of generate(); backends without a
+    native async client run generate() on the loop's default executor.
+    generate_content() keeps Gemini-style callers working with any backend.
+    """
+
+    name = "base"
+
+    def generate(self, prompt, timeout=None):
+        raise NotImplementedError
+
+    async def agenerate(self, prompt, timeout=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, prompt, timeout)
+
+    def stream(self, prompt, timeout=None):
+        yield self.generate(prompt, timeout=timeout)
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return (_Response(chunk) for chunk in self.stream(prompt))
+        return _Response(self.generate(prompt))
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class _Response:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via google-generativeai, configured on first use.
+
+    Without an API key every call raises BackendError, so callers serve their fallback.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model_name="gemini-1.5-flash", api_key=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if not self.api_key:
+                        raise BackendError("No Gemini API key configured")
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt, timeout=None):
+        options = {"timeout": timeout} if timeout else None
+        return self._get_model().generate_content(prompt, request_options=options).text
+
+    async def agenerate(self, prompt, timeout=None):
+        options = {"timeout": timeout} if timeout else None
+        response = await self._get_model().generate_content_async(prompt, request_options=options)
+        return response.text
+
+    def stream(self, prompt, timeout=None):
+        options = {"timeout": timeout} if timeout else None
+        for chunk in self._get_model().generate_content(prompt, stream=True, request_options=options):
+            yield chunk.text
+
+
+class HTTPStubBackend(LLMBackend):
+    """Client for llm_stub_server.py, or any server speaking the same protocol.
+
+    POST {url}/generate with {"prompt": ..., "stream": bool}. A plain reply is
+    {"text": ...}; a streamed reply is newline-delimited {"text": chunk} objects.
+    """
+
+    name = "http-stub"
+
+    def __init__(self, url="http://127.0.0.1:8765", default_timeout=30.0):
+        self.url = url.rstrip("/") + "/generate"
+        self.default_timeout = default_timeout
+
+    def _open(self, prompt, stream, timeout):
+        body = json.dumps({"prompt": prompt, "stream": stream}).encode("utf-8")
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            return urllib.request.urlopen(req, timeout=timeout or self.default_timeout)
+        except urllib.error.HTTPError as e:
+            raise BackendError(f"Stub backend returned HTTP {e.code}") from e
+        except urllib.error.URLError as e:
+            raise BackendError(f"Stub backend unreachable: {e.reason}") from e
+
+    def generate(self, prompt, timeout=None):
+        with self._open(prompt, False, timeout) as response:
+            return json.loads(response.read())["text"]
+
+    async def agenerate(self, prompt, timeout=None):
+        # One request per connection over asyncio streams, so waiting holds no thread
+        url = urllib.parse.urlsplit(self.url)
+        body = json.dumps({"prompt": prompt, "stream": False}).encode("utf-8")
+        head = (
+            f"POST {url.path} HTTP/1.1\r\nHost: {url.netloc}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        ).encode("latin-1")
+
+        async def exchange():
+            try:
+                reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+            except OSError as e:
+                raise BackendError(f"Stub backend unreachable: {e}") from e
+            try:
+                writer.write(head + body)
+                status = int((await reader.readline()).split()[1])
+                length = None
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                data = await (reader.readexactly(length) if length is not None else reader.read())
+            finally:
+                writer.close()
+            if status != 200:
+                raise BackendError(f"Stub backend returned HTTP {status}")
+            return json.loads(data)["text"]
+
+        return await asyncio.wait_for(exchange(), timeout or self.default_timeout)
+
+    def stream(self, prompt, timeout=None):
+        with self._open(prompt, True, timeout) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)["text"]
+
+
+class ModelAdapterBackend(LLMBackend):
+    """Wraps any object with a Gemini-style generate_content(prompt)"""
+
+    name = "adapter"
+
+    def __init__(self, model):
+        self.model = model
+
+    def generate(self, prompt, timeout=None):
+        return self.model.generate_content(prompt).text
+
+
+class FakeBackend(LLMBackend):
+    """In-process stand-in that sleeps for a sampled latency and returns canned replies.
+
+    distribution is "fixed" (always mean_ms), "uniform" (mean_ms +/- spread_ms)
+    or "lognormal" (median mean_ms with sigma spread_ms / mean_ms, which gives
+    the long right tail real model latency has).
+    """
+
+    name = "fake"
+
+    def __init__(self, mean_ms=500, spread_ms=0, distribution="fixed", error_rate=0.0, seed=None):
+        self.mean_ms = mean_ms
+        self.spread_ms = spread_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def sample_latency_s(self):
+        if self.distribution == "uniform":
+            ms = self.random.uniform(self.mean_ms - self.spread_ms, self.mean_ms + self.spread_ms)
+        elif self.distribution == "lognormal":
+            sigma = self.spread_ms / self.mean_ms if self.mean_ms else 0.0
+            ms = self.random.lognormvariate(0.0, sigma) * self.mean_ms
+        else:
+            ms = self.mean_ms
+        return max(ms, 0.0) / 1000
+
+    def generate(self, prompt, timeout=None):
+        delay, fail = self._next_call()
+        time.sleep(delay)
+        return self._reply(prompt, fail)
+
+    async def agenerate(self, prompt, timeout=None):
+        delay, fail = self._next_call()
+        await asyncio.sleep(delay)
+        return self._reply(prompt, fail)
+
+    def _next_call(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.sample_latency_s()
+            fail = self.error_rate and self.random.random() < self.error_rate
+        return delay, fail
+
+    def _reply(self, prompt, fail):
+        from llm_stub_server import canned_reply
+        if fail:
+            raise BackendError("Injected failure")
+        return canned_reply(prompt)
+
+
+def as_backend(model):
+    """Return model as an LLMBackend, wrapping Gemini-style stand-ins"""
+    return model if isinstance(model, LLMBackend) else ModelAdapterBackend(model)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures (errors, deadline misses or
+    calls slower than the slow-call threshold) the breaker opens and rejects
+    calls for `reset_timeout` seconds. It then lets a single trial call through:
+    success closes it again, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._counters = {"successes": 0, "failures": 0, "rejected": 0, "trips": 0}
+
+    def allow(self):
+        """Return True if a call may proceed now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._counters["rejected"] += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self._counters["rejected"] += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def rejecting(self):
+        """Return True if allow() would reject a call now, counting the rejection.
+
+        Unlike allow() it never claims the half-open trial, so callers can
+        check before queueing for a call they may not get to make.
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+                self._counters["rejected"] += 1
+                return True
+            if self.state == self.HALF_OPEN and self._trial_in_flight:
+                self._counters["rejected"] += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._counters["successes"] += 1
+            self._failures = 0
+            self._trial_in_flight = False
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._counters["failures"] += 1
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self._counters["trips"] += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["state"] = self.state
+            stats["consecutive_failures"] = self._failures
+        return stats
+
+
+class ResilientBackend(LLMBackend):
+    """Adds a per-call deadline and a circuit breaker to another backend.
+
+    Calls run on a worker pool so the caller stops waiting at the deadline
+    even if the underlying client ignores its own timeout; the abandoned call
+    finishes in the background. agenerate() awaits the backend's coroutine
+    directly and cancels it at the deadline.
+    """
+
+    def __init__(self, backend, deadline=10.0, slow_call_threshold=None, breaker=None, max_workers=32):
+        self.backend = backend
+        self.name = backend.name
+        self.deadline = deadline
+        self.slow_call_threshold = slow_call_threshold or deadline
+        self.breaker = breaker or CircuitBreaker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+        self._counters = {"calls": 0, "deadline_exceeded": 0, "slow_calls": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout=None):
+        deadline = min(timeout, self.deadline) if timeout else self.deadline
+        self._before_call()
+        start = time.monotonic()
+        future = self._executor.submit(self.backend.generate, prompt, deadline)
+        try:
+            text = future.result(timeout=deadline)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count("deadline_exceeded")
+            self.breaker.record_failure()
+            raise DeadlineExceeded(f"{self.name} backend did not answer within {deadline}s")
+        except Exception:
+            self._count("errors")
+            self.breaker.record_failure()
+            raise
+        self._after_call(time.monotonic() - start)
+        return text
+
+    async def agenerate(self, prompt, timeout=None):
+        deadline = min(timeout, self.deadline) if timeout else self.deadline
+        self._before_call()
+        start = time.monotonic()
+        try:
+            text = await asyncio.wait_for(self.backend.agenerate(prompt, deadline), deadline)
+        except asyncio.TimeoutError:
+            self._count("deadline_exceeded")
+            self.breaker.record_failure()
+            raise DeadlineExceeded(f"{self.name} backend did not answer within {deadline}s")
+        except Exception:
+            self._count("errors")
+            self.breaker.record_failure()
+            raise
+        self._after_call(time.monotonic() - start)
+        return text
+
+    def stream(self, prompt, timeout=None):
+        deadline = min(timeout, self.deadline) if timeout else self.deadline
+        self._before_call()
+        start = time.monotonic()
+        try:
+            for chunk in self.backend.stream(prompt, timeout=deadline):
+                if time.monotonic() - start > deadline:
+                    raise DeadlineExceeded(f"{self.name} backend stream exceeded {deadline}s")
+                yield chunk
+        except DeadlineExceeded:
+            self._count("deadline_exceeded")
+            self.breaker.record_failure()
+            raise
+        except GeneratorExit:
+            # The consumer stopped early (e.g. the JSON closed); that is not a failure
+            self._after_call(time.monotonic() - start)
+            raise
+        except Exception:
+            self._count("errors")
+            self.breaker.record_failure()
+            raise
+        self._after_call(time.monotonic() - start)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats["backend"] = self.name
+        stats["deadline_s"] = self.deadline
+        stats["circuit_breaker"] = self.breaker.stats()
+        return stats
+
+    def _before_call(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {self.name} backend")
+        self._count("calls")
+
+    def _after_call(self, elapsed):
+        if elapsed > self.slow_call_threshold:
+            self._count("slow_calls")
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
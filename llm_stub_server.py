@@ -0,0 +1,150 @@
+"""Local stand-in for the Gemini API with configurable latency and errors.
+
+Speaks the protocol HTTPStubBackend expects, so the recommender can be run
+and load-tested with no network access:
+
+    python llm_stub_server.py --port 8765 --latency-ms 800 --jitter-ms 400 \\
+        --slow-rate 0.05 --slow-ms 8000 --error-rate 0.02
+    LLM_BACKEND=stub LLM_STUB_URL=http://127.0.0.1:8765 python movie_recommender.py
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FINAL_RECOMMENDATIONS_REPLY = {
+    "single_recommendation": "Inception (2010) - A mind-bending pick from the local stub",
+    "ten_recommendations": "Inception, The Matrix, Interstellar, Arrival, Blade Runner, Up, Coco, Heat, Alien, Fargo"
+}
+
+DYNAMIC_REPLY = {
+    "ai_response": "Here are a few picks I think you'll enjoy, straight from the local stub!",
+    "is_asking_question": False,
+    "conversation_complete": True,
+    "single_recommendation": FINAL_RECOMMENDATIONS_REPLY["single_recommendation"],
+    "ten_recommendations": FINAL_RECOMMENDATIONS_REPLY["ten_recommendations"]
+}
+
+
+def canned_reply(prompt):
+    """Return a plausible model completion for either of the recommender's prompts"""
+    if "provide exactly 10 movie recommendations" in prompt:
+        return json.dumps(FINAL_RECOMMENDATIONS_REPLY)
+    return json.dumps(DYNAMIC_REPLY)
+
+
+class LatencyProfile:
+    """Latency and error injection settings shared by all handler threads"""
+
+    def __init__(self, latency_ms=500, jitter_ms=0, slow_rate=0.0, slow_ms=0, error_rate=0.0,
+                 error_status=503, chunk_delay_ms=30, chunk_size=12, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.chunk_delay_ms = chunk_delay_ms
+        self.chunk_size = chunk_size
+        self.random = random.Random(seed)
+
+    def delay_s(self):
+        """Time to first byte for one call"""
+        if self.slow_rate and self.random.random() < self.slow_rate:
+            return self.slow_ms / 1000
+        return max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def should_fail(self):
+        return self.error_rate and self.random.random() < self.error_rate
+
+
+def make_handler(profile):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self._reply(404, {"error": "Not found"})
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._reply(400, {"error": "Invalid JSON"})
+                return
+
+            time.sleep(profile.delay_s())
+            if profile.should_fail():
+                self._reply(profile.error_status, {"error": "Injected failure"})
+                return
+
+            text = canned_reply(payload.get("prompt", ""))
+            if not payload.get("stream"):
+                self._reply(200, {"text": text})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(text), profile.chunk_size):
+                line = json.dumps({"text": text[i:i + profile.chunk_size]}).encode("utf-8") + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                time.sleep(profile.chunk_delay_ms / 1000)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def make_server(host="127.0.0.1", port=8765, profile=None):
+    server = ThreadingHTTPServer((host, port), make_handler(profile or LatencyProfile()))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini stand-in with latency and error injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of calls that take --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=10000)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--chunk-delay-ms", type=float, default=30, help="delay between streamed chunks")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    profile = LatencyProfile(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms, error_rate=args.error_rate, error_status=args.error_status,
+        chunk_delay_ms=args.chunk_delay_ms, seed=args.seed
+    )
+    server = make_server(args.host, args.port, profile)
+    print(f"LLM stub listening on http://{args.host}:{args.port}/generate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+
+# Stage latencies range from microseconds (input analysis) to seconds (model calls)
+DEFAULT_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self.labels()
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _CounterChild())
+        return child
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [(self.name, key, child.value) for key, child in sorted(self._children.items())]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        lock = self._lock
+        lock.acquire()
+        self.value += amount
+        lock.release()
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = ()
+        self.callback = callback
+
+    def samples(self):
+        return [(self.name, (), float(self.callback()))]
+
+
+class CallbackCounter(Gauge):
+    """Counter whose running total is read from a callback at scrape time.
+
+    For totals another component already keeps, such as cache hit counts.
+    """
+
+    kind = "counter"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by label values.
+
+    Children are created once per label set and cached, so observing costs a
+    bisect over the bucket bounds and a short critical section.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self):
+        samples = []
+        for key, child in sorted(self._children.items()):
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((self.name + "_bucket", key + (_format_bound(bound),), cumulative))
+            samples.append((self.name + "_bucket", key + ("+Inf",), count))
+            samples.append((self.name + "_sum", key, total))
+            samples.append((self.name + "_count", key, count))
+        return samples
+
+    def sample_labelnames(self, sample_name):
+        if sample_name.endswith("_bucket"):
+            return self.labelnames + ("le",)
+        return self.labelnames
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "_sum", "_count", "_lock")
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self._bounds, value)
+        lock = self._lock
+        lock.acquire()
+        self._counts[index] += 1
+        self._sum += value
+        self._count += 1
+        lock.release()
+
+    def time(self):
+        return _Span(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts[:-1]), self._sum, self._count
+
+
+class _Span:
+    """Context manager that records its elapsed time into a histogram child"""
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same as self._child.observe(), inlined because this runs on every stage of every request
+        elapsed = perf_counter() - self._start
+        child = self._child
+        index = bisect_left(child._bounds, elapsed)
+        lock = child._lock
+        lock.acquire()
+        child._counts[index] += 1
+        child._sum += elapsed
+        child._count += 1
+        lock.release()
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, callback):
+        return self.register(Gauge(name, documentation, callback))
+
+    def callback_counter(self, name, documentation, callback):
+        if not name.endswith("_total"):
+            raise ValueError(f"Counter names must end in _total: {name}")
+        return self.register(CallbackCounter(name, documentation, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, label_values, value in metric.samples():
+                if isinstance(metric, Histogram):
+                    labelnames = metric.sample_labelnames(sample_name)
+                else:
+                    labelnames = metric.labelnames
+                lines.append(f"{sample_name}{_format_labels(labelnames, label_values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
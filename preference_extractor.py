@@ -0,0 +1,104 @@
+import json
+import os
+import re
+from collections import namedtuple
+
+
+DEFAULT_VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "vocabulary.json")
+
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+
+PreferenceMatch = namedtuple("PreferenceMatch", ["category", "value", "start", "end"])
+
+
+class PreferenceExtractor:
+    """Single-pass vocabulary matcher for genres, moods, actors, directors and titles.
+
+    The vocabulary maps each category to canonical values and their surface
+    forms (synonyms). All surface forms are compiled into one regular
+    expression shaped like a trie, so matching cost depends on the length of
+    the utterance rather than on the number of vocabulary entries.
+    """
+
+    def __init__(self, vocabulary):
+        self._lookup = {}
+        for category, entries in vocabulary.items():
+            for canonical, synonyms in entries.items():
+                for term in [canonical] + list(synonyms):
+                    term = _normalize(term)
+                    if term:
+                        # The first category to claim a surface form wins
+                        self._lookup.setdefault(term, (category, canonical))
+
+        self.categories = tuple(vocabulary)
+        self.size = len(self._lookup)
+        self._pattern = re.compile(
+            r'(?<!\w)(?:' + _trie_pattern(self._lookup) + r')(?!\w)'
+        ) if self._lookup else None
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_VOCABULARY_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def extract(self, text):
+        """Return every vocabulary match in text, in order of appearance"""
+        if self._pattern is None:
+            return []
+        normalized, offsets = _normalize_text(text)
+        matches = []
+        for match in self._pattern.finditer(normalized):
+            category, value = self._lookup[match.group()]
+            start, end = match.start(), match.end()
+            if offsets is not None:
+                start, end = offsets[start], offsets[end]
+            matches.append(PreferenceMatch(category, value, start, end))
+        return matches
+
+
+def _normalize(term):
+    return " ".join(term.lower().split())
+
+
+def _normalize_text(text):
+    """Lowercase text for matching; returns (lowered, offsets).
+
+    offsets is None when lowercasing keeps the length, so spans in lowered
+    are spans in text. Otherwise (e.g. "İ" lowercases to two characters)
+    offsets[i] is the index in text of lowered[i], with one extra entry for
+    the end of the text.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered, None
+    pieces, offsets = [], []
+    for index, ch in enumerate(text):
+        low = ch.lower()
+        pieces.append(low)
+        offsets.extend([index] * len(low))
+    offsets.append(len(text))
+    return "".join(pieces), offsets
+
+
+def _trie_pattern(terms):
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    terminal = "" in node
+    branches = [re.escape(ch) + _node_pattern(child) for ch, child in sorted(node.items()) if ch]
+
+    if not branches:
+        return ""
+    if len(branches) == 1 and not terminal:
+        body = branches[0]
+    else:
+        body = "(?:" + "|".join(branches) + ")"
+    # Longer matches are tried first; the empty alternative lets a shorter term end here
+    return body + "?" if terminal else body
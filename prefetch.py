@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PendingRecommendations:
+    """A speculative call for a session, tagged with the preferences it was started for"""
+
+    __slots__ = ("key", "future")
+
+    def __init__(self, key, future):
+        self.key = key
+        self.future = future
+
+
+class RecommendationPrefetcher:
+    """Starts final-recommendation calls before the turn that needs them.
+
+    start() submits fn(preferences) on a small pool and keeps the future in
+    a process-local map under the session id, tagged with
+    key_fn(preferences), so the next turn finds it whichever copy of the
+    session it loads. take() hands the result over only if the session's
+    preferences still produce the same key; otherwise the call is cancelled
+    if it has not started yet, or counted as wasted. A call that raises is
+    counted as an error and never served. Beyond `max_pending` sessions the
+    oldest prefetch is dropped, so prefetches whose next turn went to another
+    worker are counted too.
+    """
+
+    def __init__(self, fn, key_fn, max_workers=4, max_pending=1024):
+        self.fn = fn
+        self.key_fn = key_fn
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._pending = OrderedDict()  # session id -> PendingRecommendations, oldest first
+        self._lock = threading.Lock()
+        self._counters = {"started": 0, "hits": 0, "wasted": 0, "cancelled": 0, "errors": 0}
+
+    def start(self, session):
+        """Prefetch for the session's current preferences unless already doing so"""
+        key = self.key_fn(session.user_preferences)
+        with self._lock:
+            pending = self._pending.get(session.session_id)
+        if pending is not None and pending.key == key:
+            return pending
+
+        pending = PendingRecommendations(key, self._executor.submit(self.fn, dict(session.user_preferences)))
+        with self._lock:
+            dropped = [self._pending.pop(session.session_id, None)]
+            self._pending[session.session_id] = pending
+            self._counters["started"] += 1
+            while len(self._pending) > self.max_pending:
+                dropped.append(self._pending.popitem(last=False)[1])
+        for old in dropped:
+            if old is not None:
+                self._drop(old)
+        return pending
+
+    def take(self, session, timeout=None):
+        """Return the prefetched result if it still matches the session's preferences, else None.
+
+        Waits up to `timeout` seconds for a call that is still running.
+        """
+        pending = self._claim(session)
+        if pending is None:
+            return None
+        try:
+            result = pending.future.result(timeout=timeout)
+        except Exception as e:
+            return self._failed(e)
+        self._count("hits")
+        return result
+
+    async def atake(self, session, timeout=None):
+        """take() for asyncio callers; waits without blocking the event loop"""
+        pending = self._claim(session)
+        if pending is None:
+            return None
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(pending.future), timeout)
+        except Exception as e:
+            return self._failed(e)
+        self._count("hits")
+        return result
+
+    def discard(self, session):
+        with self._lock:
+            pending = self._pending.pop(session.session_id, None)
+        if pending is not None:
+            self._drop(pending)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._pending)
+        stats["hit_rate"] = round(stats["hits"] / stats["started"], 4) if stats["started"] else 0.0
+        return stats
+
+    def _claim(self, session):
+        with self._lock:
+            pending = self._pending.pop(session.session_id, None)
+        if pending is None:
+            return None
+        if pending.key != self.key_fn(session.user_preferences):
+            self._drop(pending)
+            return None
+        return pending
+
+    def _failed(self, error):
+        print(f"Prefetched recommendations unavailable: {error!r}")
+        self._count("errors")
+        return None
+
+    def _drop(self, pending):
+        self._count("cancelled" if pending.future.cancel() else "wasted")
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
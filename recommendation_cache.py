@@ -0,0 +1,144 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class RecommendationCache:
+    """Two-tier cache for final recommendations.
+
+    The first tier is an in-memory LRU with a per-entry TTL. The optional
+    second tier is a SQLite file that survives restarts; entries found there
+    are promoted back into memory. The disk tier is best-effort: an error
+    such as a locked database is counted and treated as a miss or a skipped
+    write, never raised to the caller.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()  # guards the memory tier and counters only; disk I/O runs outside it
+        self._local = threading.local()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "writes": 0,
+            "disk_errors": 0,
+        }
+
+        if disk_path:
+            self._db().execute(
+                "CREATE TABLE IF NOT EXISTS recommendations ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counters["expirations"] += 1
+
+        value = None
+        if self.disk_path:
+            try:
+                value = self._disk_get(key, now)
+            except sqlite3.Error as e:
+                self._disk_failed("read", e)
+
+        with self._lock:
+            self._counters["misses" if value is None else "disk_hits"] += 1
+        return value
+
+    def set(self, key, value):
+        """Store value under key in both tiers"""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+            self._counters["writes"] += 1
+        if self.disk_path:
+            try:
+                self._db().execute(
+                    "INSERT OR REPLACE INTO recommendations (key, value, expires_at) VALUES (?, ?, ?)",
+                    (_disk_key(key), json.dumps(value), expires_at)
+                )
+            except sqlite3.Error as e:
+                self._disk_failed("write", e)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            try:
+                self._db().execute("DELETE FROM recommendations")
+            except sqlite3.Error as e:
+                self._disk_failed("clear", e)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["disk_enabled"] = bool(self.disk_path)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _db(self):
+        # sqlite3 connections must not be shared between threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # A short busy timeout: waiting on another worker's write costs more than a miss.
+            # Autocommit, so a failed statement never leaves a transaction open.
+            db = sqlite3.connect(self.disk_path, timeout=1.0, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def _disk_get(self, key, now):
+        """Read key from disk, promoting a live entry into memory; None if absent or expired"""
+        db = self._db()
+        row = db.execute(
+            "SELECT value, expires_at FROM recommendations WHERE key = ?",
+            (_disk_key(key),)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = json.loads(row[0]), row[1]
+        if expires_at > now:
+            with self._lock:
+                self._store(key, value, expires_at)
+            return value
+        with self._lock:
+            self._counters["expirations"] += 1
+        db.execute("DELETE FROM recommendations WHERE key = ? AND expires_at <= ?", (_disk_key(key), now))
+        return None
+
+    def _disk_failed(self, operation, error):
+        with self._lock:
+            self._counters["disk_errors"] += 1
+        print(f"Recommendation cache disk {operation} failed: {error}")
+
+    def _store(self, key, value, expires_at):
+        # Caller holds the lock
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+
+def _disk_key(key):
+    return json.dumps(key, separators=(",", ":"))
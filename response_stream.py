@@ -0,0 +1,132 @@
+import json
+
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+
+class AiResponseStreamParser:
+    """Incrementally scans a streamed JSON completion.
+
+    feed() returns the newly decoded characters of the top-level
+    "ai_response" string as soon as they arrive, and sets `closed` once the
+    outermost JSON object has been terminated so the caller can parse the
+    full document without waiting for the stream to end.
+
+    A reply that starts with plain text instead of JSON is passed through as
+    it arrives, up to the first "{". Text before a code fence is not.
+    """
+
+    def __init__(self, field="ai_response"):
+        self.field = field
+        self.text = []
+        self.closed = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._unicode = None  # hex digits of a pending \uXXXX escape
+        self._high_surrogate = None
+        self._string = []
+        self._key = None
+        self._expect_value = False
+        self._capturing = False
+        self._plain = None  # whether the reply opened with prose; None until its first non-space character
+
+    @property
+    def raw(self):
+        return "".join(self.text)
+
+    def feed(self, chunk):
+        """Consume the next chunk and return the decoded ai_response delta"""
+        self.text.append(chunk)
+        if self.closed:
+            return ""
+
+        delta = []
+        for ch in chunk:
+            if self._in_string:
+                decoded = self._string_char(ch)
+                if decoded:
+                    self._string.append(decoded)
+                    if self._capturing:
+                        delta.append(decoded)
+                continue
+
+            if self._depth == 0 and ch != '{':
+                if self._plain is None and not ch.isspace():
+                    self._plain = ch != '`'
+                if self._plain:
+                    delta.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+                self._capturing = self._depth == 1 and self._expect_value and self._key == self.field
+            elif ch == '{' or ch == '[':
+                self._plain = False
+                self._depth += 1
+                self._expect_value = False
+            elif ch == '}' or ch == ']':
+                self._depth -= 1
+                if self._depth == 0 and ch == '}':
+                    self.closed = True
+                    break
+            elif ch == ':':
+                self._expect_value = True
+            elif ch == ',':
+                self._expect_value = False
+                self._key = None
+
+        return "".join(delta)
+
+    def _string_char(self, ch):
+        """Advance the string state by one character and return any decoded text"""
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) < 4:
+                return ""
+            code = int(self._unicode, 16)
+            self._unicode = None
+            if 0xD800 <= code <= 0xDBFF:
+                self._high_surrogate = code
+                return ""
+            if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            return chr(code)
+
+        if self._escape:
+            self._escape = False
+            if ch == 'u':
+                self._unicode = ""
+                return ""
+            return _SIMPLE_ESCAPES.get(ch, ch)
+
+        if ch == '\\':
+            self._escape = True
+            return ""
+
+        if ch == '"':
+            self._in_string = False
+            if self._depth == 1 and not self._expect_value:
+                self._key = "".join(self._string)
+            else:
+                self._expect_value = False
+            self._capturing = False
+            return ""
+
+        return ch
+
+
+def sse_event(event, data):
+    """Format a Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,291 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from llm_backend import BackendError, CircuitOpenError, LLMBackend
+
+
+# Lower runs first
+PRIORITY_ONGOING = 0      # a later turn of a conversation already in progress
+PRIORITY_NEW = 1          # the first turn of a conversation
+PRIORITY_BACKGROUND = 2   # speculative or bulk work (prefetch, batch)
+
+_call_priority = contextvars.ContextVar("model_call_priority", default=PRIORITY_NEW)
+_DEFAULT_TIMEOUT = object()  # use the scheduler's queue_timeout
+_call_queue_timeout = contextvars.ContextVar("model_call_queue_timeout", default=_DEFAULT_TIMEOUT)
+
+
+class LoadShed(BackendError):
+    """The call was not admitted or waited past the queue deadline; serve the fallback instead"""
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`. Callers serialize access."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now):
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now, position=1):
+        """Seconds until `position` tokens will have accrued"""
+        self._refill(now)
+        return max(0.0, (position - self.tokens) / self.rate)
+
+
+class _Waiter:
+    __slots__ = ("priority", "state", "event", "loop", "future", "enqueued")
+
+    WAITING = 0
+    GRANTED = 1
+    SHED = 2
+
+    def __init__(self, priority, loop=None):
+        self.priority = priority
+        self.state = self.WAITING
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+        self.enqueued = time.monotonic()
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ModelCallScheduler:
+    """Admission control for outbound model calls.
+
+    Calls take a token from a token bucket sized to the provider quota. When
+    none is available they wait in a bounded priority queue, ongoing
+    conversations ahead of new ones and background work last. A call is shed
+    (LoadShed) instead of queued when the queue is full of equal or better
+    work, when its predicted wait already exceeds `queue_timeout`, or when it
+    actually waits that long; a full queue drops its worst waiter to admit a
+    better one. A dispatcher thread hands out tokens as they accrue. A block
+    of calls may set its own queue deadline, or none, through priority().
+
+    With rate=0 there is no limit and every call is admitted immediately.
+    """
+
+    def __init__(self, rate=0.0, burst=1, max_queue=100, queue_timeout=2.0, observe_wait=None):
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.observe_wait = observe_wait
+        self._queue = []  # heap of (priority, seq, waiter); shed waiters are skipped lazily
+        self._seq = itertools.count()
+        self._depth = 0
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._counters = {
+            "admitted": 0,
+            "queued": 0,
+            "shed_queue_full": 0,
+            "shed_predicted_wait": 0,
+            "shed_deadline": 0,
+            "shed_displaced": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+    @contextmanager
+    def priority(self, priority, queue_timeout=_DEFAULT_TIMEOUT):
+        """Run model calls made in this block (thread or task) at `priority`.
+
+        `queue_timeout` replaces the scheduler's queue deadline for these
+        calls; None lets them wait as long as it takes. Without it, calls
+        keep the deadline of any enclosing block.
+        """
+        token = _call_priority.set(priority)
+        timeout_token = None if queue_timeout is _DEFAULT_TIMEOUT else _call_queue_timeout.set(queue_timeout)
+        try:
+            yield
+        finally:
+            if timeout_token is not None:
+                _call_queue_timeout.reset(timeout_token)
+            _call_priority.reset(token)
+
+    def call_class(self):
+        """(priority, queue deadline) for calls made here; calls of different classes must not share one call"""
+        return _call_priority.get(), self._call_timeout()
+
+    def _call_timeout(self):
+        timeout = _call_queue_timeout.get()
+        return self.queue_timeout if timeout is _DEFAULT_TIMEOUT else timeout
+
+    def acquire(self, priority=None):
+        """Block until the call may proceed; raises LoadShed"""
+        timeout = self._call_timeout()
+        waiter = self._admit(_call_priority.get() if priority is None else priority, timeout)
+        if waiter is None:
+            return
+        waiter.event.wait(timeout)
+        self._settle(waiter)
+
+    async def aacquire(self, priority=None):
+        """acquire() for asyncio callers"""
+        loop = asyncio.get_running_loop()
+        timeout = self._call_timeout()
+        waiter = self._admit(_call_priority.get() if priority is None else priority, timeout, loop)
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._settle(waiter)
+
+    def queue_depth(self):
+        with self._cond:
+            return self._depth
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats["queue_depth"] = self._depth
+        stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 3)
+        stats["shed"] = sum(v for k, v in stats.items() if k.startswith("shed_"))
+        stats["rate_per_s"] = self.bucket.rate if self.bucket else None
+        stats["max_queue"] = self.max_queue
+        stats["queue_timeout_s"] = self.queue_timeout
+        return stats
+
+    def _admit(self, priority, timeout, loop=None):
+        """Grant now (None), shed (raise), or enqueue and return the waiter"""
+        if self.bucket is None:
+            with self._cond:
+                self._counters["admitted"] += 1
+            return None
+
+        with self._cond:
+            now = time.monotonic()
+            if self._depth == 0 and self.bucket.try_take(now):
+                self._counters["admitted"] += 1
+                return None
+
+            live = [entry for entry in self._queue if entry[2].state == _Waiter.WAITING]
+            ahead = sum(1 for entry in live if entry[0] <= priority)
+            if timeout is not None and self.bucket.wait_time(now, ahead + 1) > timeout:
+                self._counters["shed_predicted_wait"] += 1
+                raise LoadShed("Model call queue wait would exceed the deadline")
+
+            if self._depth >= self.max_queue:
+                worst = max(live, key=lambda entry: (entry[0], entry[1])) if live else None
+                if worst is None or worst[0] <= priority:
+                    self._counters["shed_queue_full"] += 1
+                    raise LoadShed("Model call queue is full")
+                worst[2].state = _Waiter.SHED
+                self._depth -= 1
+                self._counters["shed_displaced"] += 1
+                worst[2].wake()
+
+            waiter = _Waiter(priority, loop)
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._depth += 1
+            self._counters["queued"] += 1
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="model-scheduler", daemon=True)
+                self._dispatcher.start()
+            self._cond.notify()
+            return waiter
+
+    def _settle(self, waiter):
+        with self._cond:
+            waited = time.monotonic() - waiter.enqueued
+            self._counters["wait_seconds_total"] += waited
+            if waiter.state == _Waiter.WAITING:
+                # Timed out in the queue; the dispatcher will skip the entry
+                waiter.state = _Waiter.SHED
+                self._depth -= 1
+                self._counters["shed_deadline"] += 1
+            state = waiter.state
+            if state == _Waiter.GRANTED:
+                self._counters["admitted"] += 1
+        if self.observe_wait is not None:
+            self.observe_wait(waited)
+        if state != _Waiter.GRANTED:
+            raise LoadShed(f"Model call shed after waiting {waited:.2f}s in the queue")
+
+    def _dispatch(self):
+        with self._cond:
+            while True:
+                while self._queue and self._queue[0][2].state != _Waiter.WAITING:
+                    heapq.heappop(self._queue)
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+                wait = self.bucket.wait_time(time.monotonic())
+                if wait > 0:
+                    # Re-check after waiting: a better waiter may have arrived or the head been shed
+                    self._cond.wait(wait)
+                    continue
+                self.bucket.try_take(time.monotonic())
+                waiter = heapq.heappop(self._queue)[2]
+                waiter.state = _Waiter.GRANTED
+                self._depth -= 1
+                waiter.wake()
+
+
+class ScheduledBackend(LLMBackend):
+    """Routes every call on another backend through a ModelCallScheduler.
+
+    If the wrapped backend has an open circuit breaker, calls fail at once
+    instead of queueing and spending a token on a call that would be rejected.
+    """
+
+    def __init__(self, backend, scheduler):
+        self.backend = backend
+        self.name = backend.name
+        self.scheduler = scheduler
+
+    @property
+    def deadline(self):
+        return self.backend.deadline
+
+    def generate(self, prompt, timeout=None):
+        self._check_breaker()
+        self.scheduler.acquire()
+        return self.backend.generate(prompt, timeout=timeout)
+
+    async def agenerate(self, prompt, timeout=None):
+        self._check_breaker()
+        await self.scheduler.aacquire()
+        return await self.backend.agenerate(prompt, timeout=timeout)
+
+    def stream(self, prompt, timeout=None):
+        self._check_breaker()
+        self.scheduler.acquire()
+        yield from self.backend.stream(prompt, timeout=timeout)
+
+    def _check_breaker(self):
+        breaker = getattr(self.backend, "breaker", None)
+        if breaker is not None and breaker.rejecting():
+            raise CircuitOpenError(f"Circuit open for {self.name} backend")
+
+    def stats(self):
+        stats = self.backend.stats()
+        stats["scheduler"] = self.scheduler.stats()
+        return stats
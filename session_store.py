@@ -0,0 +1,384 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from conversation_context import ConversationSummary
+
+
+class MessageRing:
+    """Fixed-capacity ring buffer of messages.
+
+    Backed by a plain list that grows up to maxlen and is then overwritten in
+    place, which is several hundred bytes smaller per session than a deque.
+    """
+
+    __slots__ = ("maxlen", "_items", "_start")
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self._items = []
+        self._start = 0
+
+    def append(self, item):
+        if len(self._items) < self.maxlen:
+            self._items.append(item)
+        else:
+            self._items[self._start] = item
+            self._start = (self._start + 1) % self.maxlen
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        items = self._items
+        start = self._start
+        for i in range(len(items)):
+            yield items[(start + i) % len(items)]
+
+    def __getitem__(self, index):
+        length = len(self._items)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("message index out of range")
+        return self._items[(self._start + index) % length]
+
+
+class ConversationSession:
+    """State for a single chat conversation.
+
+    History is a bounded ring buffer of (text, is_user, timestamp) tuples so a
+    long conversation cannot grow the session without limit; message_count
+    keeps counting past the cap. `turn` is the sequence number of the last
+    accepted user turn, which clients echo back to detect lost or replayed
+    messages. `summary` is the rolling summary of messages older than the
+    prompt's verbatim window. `saved_turn` is the turn a shared store last read or wrote, which its
+    save() checks to detect a concurrent update from another worker.
+    """
+
+    __slots__ = (
+        "session_id",
+        "conversation_history",
+        "user_preferences",
+        "conversation_stage",
+        "questions_asked",
+        "message_count",
+        "turn",
+        "saved_turn",
+        "summary",
+        "last_access",
+    )
+
+    max_history = 50
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.conversation_history = MessageRing(self.max_history)
+        self.user_preferences = {}
+        self.conversation_stage = "initial"  # initial, asking_genre, asking_mood, asking_actors, complete
+        self.questions_asked = []
+        self.message_count = 0
+        self.turn = 0
+        self.saved_turn = 0
+        self.summary = None  # created once the conversation outgrows the verbatim window
+        self.last_access = time.monotonic()
+
+    def add_message(self, text, is_user=True):
+        self.conversation_history.append((text, is_user, time.time()))
+        self.message_count += 1
+
+    def begin_turn(self, turn=None):
+        """Accept the next user turn; False if `turn` is not the one that follows self.turn.
+
+        Callers that do not track turns pass None and are always accepted.
+        """
+        if turn is not None and turn != self.turn + 1:
+            return False
+        self.turn += 1
+        return True
+
+    def update_preferences(self, preferences):
+        self.user_preferences.update(preferences)
+
+    def history_as_dicts(self):
+        return [
+            {"text": text, "is_user": is_user, "timestamp": timestamp}
+            for text, is_user, timestamp in self.conversation_history
+        ]
+
+    def get_conversation_context(self):
+        return {
+            "history": self.history_as_dicts(),
+            "preferences": self.user_preferences,
+            "stage": self.conversation_stage,
+            "questions_asked": self.questions_asked
+        }
+
+    def dumps(self):
+        """Serialize the persistent state as a compact JSON array"""
+        return json.dumps([
+            self.conversation_stage,
+            self.user_preferences,
+            self.questions_asked,
+            self.message_count,
+            list(self.conversation_history),
+            self.turn,
+            self.summary.to_list() if self.summary is not None else None,
+        ], separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, session_id, data):
+        stage, preferences, questions_asked, message_count, history, *rest = json.loads(data)
+        session = cls(session_id)
+        # Records written before turns were tracked have no turn field
+        session.turn = rest[0] if rest else message_count // 2
+        if len(rest) > 1 and rest[1] is not None:
+            session.summary = ConversationSummary.from_list(rest[1])
+        session.conversation_stage = stage
+        session.user_preferences = preferences
+        session.questions_asked = questions_asked
+        session.message_count = message_count
+        for text, is_user, timestamp in history:
+            session.conversation_history.append((text, is_user, timestamp))
+        return session
+
+
+class SessionStore:
+    """In-memory session store with idle-TTL and max-count (LRU) eviction.
+
+    Sessions are kept in last-access order, so both expired and
+    least-recently-used sessions are found at the front of the map and
+    eviction is amortized O(1) per request.
+    """
+
+    def __init__(self, max_sessions=10000, idle_ttl_seconds=1800, session_factory=ConversationSession):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.session_factory = session_factory
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "expired": 0, "evicted": 0}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return session_id in self._sessions
+
+    def get(self, session_id):
+        """Return the live session for session_id, or None"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            session = self.create(session_id)
+        return session
+
+    def create(self, session_id=None):
+        """Create and register a new session, evicting the least recently used if full"""
+        session_id = session_id or str(uuid.uuid4())
+        session = self.session_factory(session_id)
+        with self._lock:
+            self._evict_expired(session.last_access)
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._counters["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._counters["evicted"] += 1
+        return session
+
+    def save(self, session):
+        """Persist changes made to a session during a request (a no-op in memory).
+
+        Returns False if the session was changed concurrently and this
+        request's changes were not saved; in memory that cannot happen.
+        """
+        return True
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["active"] = len(self._sessions)
+            stats["max_sessions"] = self.max_sessions
+            stats["idle_ttl_seconds"] = self.idle_ttl_seconds
+        stats["backend"] = "memory"
+        return stats
+
+    def _evict_expired(self, now):
+        # Caller holds the lock
+        cutoff = now - self.idle_ttl_seconds
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_access > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self._counters["expired"] += 1
+
+
+class SQLiteSessionStore:
+    """Session store shared by several worker processes through a SQLite file.
+
+    The database runs in WAL mode so readers never block the single writer.
+    A request loads its session once and writes it back once via save(), so
+    each turn costs one read and one write regardless of how many fields
+    changed. The write only succeeds if the stored turn is still the one the
+    request loaded; otherwise another worker handled a turn of the same
+    session in the meantime and save() returns False instead of overwriting
+    it. Idle and excess sessions are pruned every `prune_every` creates.
+    """
+
+    def __init__(self, path, max_sessions=10000, idle_ttl_seconds=1800,
+                 session_factory=ConversationSession, prune_every=100):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.session_factory = session_factory
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._creates_since_prune = 0
+        self._counters = {"created": 0, "loaded": 0, "saved": 0, "conflicts": 0, "expired": 0, "evicted": 0}
+
+        db = self._db()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_access REAL NOT NULL, "
+            "turn INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Files created before saves were conditional have no turn column
+        if "turn" not in {row[1] for row in db.execute("PRAGMA table_info(sessions)")}:
+            db.execute("ALTER TABLE sessions ADD COLUMN turn INTEGER NOT NULL DEFAULT 0")
+        db.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)")
+
+    def _db(self):
+        # sqlite3 connections must not be shared between threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+    def get(self, session_id):
+        """Return the live session for session_id, or None"""
+        row = self._db().execute(
+            "SELECT data, turn FROM sessions WHERE session_id = ? AND last_access > ?",
+            (session_id, time.time() - self.idle_ttl_seconds)
+        ).fetchone()
+        if row is None:
+            return None
+        self._count("loaded")
+        session = self.session_factory.loads(session_id, row[0])
+        session.saved_turn = row[1]
+        return session
+
+    def get_or_create(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            session = self.create(session_id)
+        return session
+
+    def create(self, session_id=None):
+        """Create a session, replacing an expired one with the same id.
+
+        If another worker has just created a live session with this id, that one is returned instead.
+        """
+        session = self.session_factory(session_id or str(uuid.uuid4()))
+        now = time.time()
+        created = self._db().execute(
+            "INSERT INTO sessions (session_id, data, last_access, turn) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET "
+            "data = excluded.data, last_access = excluded.last_access, turn = excluded.turn "
+            "WHERE sessions.last_access <= ?",
+            (session.session_id, session.dumps(), now, session.turn, now - self.idle_ttl_seconds)
+        ).rowcount
+        if not created:
+            existing = self.get(session.session_id)
+            if existing is not None:
+                return existing
+        self._count("created")
+        with self._lock:
+            self._creates_since_prune += 1
+            prune = self._creates_since_prune >= self.prune_every
+            if prune:
+                self._creates_since_prune = 0
+        if prune:
+            self.prune()
+        return session
+
+    def save(self, session):
+        """Write the session back unless another worker saved a newer turn first; False on conflict"""
+        db = self._db()
+        data = session.dumps()
+        now = time.time()
+        saved = db.execute(
+            "UPDATE sessions SET data = ?, last_access = ?, turn = ? WHERE session_id = ? AND turn = ?",
+            (data, now, session.turn, session.session_id, session.saved_turn)
+        ).rowcount
+        if not saved:
+            # Pruned since it was loaded: nothing to conflict with, so store it again
+            saved = db.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, data, last_access, turn) VALUES (?, ?, ?, ?)",
+                (session.session_id, data, now, session.turn)
+            ).rowcount
+        if not saved:
+            self._count("conflicts")
+            return False
+        session.saved_turn = session.turn
+        self._count("saved")
+        return True
+
+    def delete(self, session_id):
+        return self._db().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def prune(self):
+        """Delete expired sessions, then the least recently used beyond max_sessions"""
+        db = self._db()
+        expired = db.execute(
+            "DELETE FROM sessions WHERE last_access <= ?", (time.time() - self.idle_ttl_seconds,)
+        ).rowcount
+        evicted = db.execute(
+            "DELETE FROM sessions WHERE session_id IN ("
+            "SELECT session_id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,)
+        ).rowcount
+        self._count("expired", expired)
+        self._count("evicted", evicted)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats["active"] = len(self)
+        stats["max_sessions"] = self.max_sessions
+        stats["idle_ttl_seconds"] = self.idle_ttl_seconds
+        stats["backend"] = "sqlite"
+        return stats
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
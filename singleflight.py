@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a caller that gave up waiting on another caller's in-flight call"""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "started", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = time.monotonic()
+        self.waiters = []  # (loop, asyncio.Future) for followers awaiting from an event loop
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and receive the same result or
+    exception. A follower waits at most `timeout` seconds. A call that has
+    been running longer than that is treated as stuck, so new callers start
+    a fresh call instead of joining it.
+
+    do() serves threads and ado() serves asyncio tasks; both share the same
+    in-flight calls, so a coroutine can join a call led by a thread and vice
+    versa.
+    """
+
+    def __init__(self, timeout=30.0):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "leader_calls": 0,
+            "coalesced_calls": 0,
+            "leader_errors": 0,
+            "follower_timeouts": 0,
+            "stale_calls_replaced": 0,
+        }
+
+    def do(self, key, fn):
+        call, leader, _ = self._join(key)
+        if leader:
+            return self._lead(key, call, fn)
+
+        if not call.done.wait(self.timeout):
+            self._follower_timed_out()
+        return self._outcome(call)
+
+    async def ado(self, key, afn):
+        """Like do(), but afn is a coroutine function and followers wait without blocking the loop"""
+        call, leader, waiter = self._join(key, asyncio.get_running_loop())
+        if leader:
+            try:
+                call.result = await afn()
+                return call.result
+            except BaseException as e:
+                self._leader_failed(call, e)
+                raise
+            finally:
+                self._finish(key, call)
+
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self._follower_timed_out()
+        return self._outcome(call)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+    def _join(self, key, loop=None):
+        """Return (call, is_leader, waiter); waiter is set for asyncio followers"""
+        now = time.monotonic()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and now - call.started > self.timeout:
+                self._counters["stale_calls_replaced"] += 1
+                call = None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["leader_calls"] += 1
+                return call, True, None
+            self._counters["coalesced_calls"] += 1
+            waiter = None
+            if loop is not None:
+                waiter = loop.create_future()
+                call.waiters.append((loop, waiter))
+            return call, False, waiter
+
+    def _lead(self, key, call, fn):
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            self._leader_failed(call, e)
+            raise
+        finally:
+            self._finish(key, call)
+
+    def _leader_failed(self, call, error):
+        call.error = error
+        with self._lock:
+            self._counters["leader_errors"] += 1
+
+    def _finish(self, key, call):
+        with self._lock:
+            # A stale call may already have been replaced by a newer leader
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            waiters, call.waiters = call.waiters, []
+        call.done.set()
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _follower_timed_out(self):
+        with self._lock:
+            self._counters["follower_timeouts"] += 1
+        raise SingleFlightTimeout(f"Timed out after {self.timeout}s waiting for an in-flight call")
+
+    @staticmethod
+    def _outcome(call):
+        if call.error is not None:
+            raise call.error
+        return call.result
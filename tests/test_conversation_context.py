@@ -0,0 +1,90 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from conversation_context import ConversationSummary, ContextBuilder, estimate_tokens  # noqa: E402
+from session_store import ConversationSession  # noqa: E402
+
+
+def play(session, builder, turns):
+    """Add each (user, assistant) pair, building the context on every turn as the app does"""
+    for user_text, assistant_text in turns:
+        session.add_message(user_text, is_user=True)
+        summary = builder.update(session)
+        session.add_message(assistant_text, is_user=False)
+    return summary
+
+
+def test_digest_survives_after_its_lines_are_dropped():
+    session = ConversationSession("s")
+    builder = ContextBuilder(recent_turns=3, token_budget=600)
+    turns = [
+        ("I hated horror, no gore please. I already saw Groundhog Day",
+         "Then how about Up (2009) or The Grand Budapest Hotel (2014)?"),
+        ("Actually, make it a comedy instead", "Sure, any favourite actors?"),
+    ]
+    turns += [
+        (f"Tell me more about option {turn}, I am still deciding what to watch",
+         f"Option {turn} is a fine pick with a lot going for it tonight")
+        for turn in range(60)
+    ]
+
+    summary = play(session, builder, turns)
+    rendered = summary.render()
+    assert "I hated horror" not in rendered  # the verbatim line itself was dropped
+    assert "User ruled out: hated horror; no gore please; already saw Groundhog Day" in rendered
+    assert "Already suggested: Up (2009); The Grand Budapest Hotel (2014)" in rendered
+    assert "User changed preferences: Actually, make it a comedy instead" in rendered
+    assert summary.tokens <= builder.summary_budget
+
+
+def test_digest_lists_are_capped_and_deduplicated():
+    summary = ConversationSummary()
+    for year in range(2000, 2020):
+        summary.fold(f"Try Movie {year} ({year})", False, 200)
+        summary.fold(f"Try Movie {year} ({year})", False, 200)
+    assert len(summary.suggested) == ConversationSummary.max_suggested
+    assert summary.suggested[-1] == "Movie 2019 (2019)"
+
+
+def test_no_phrases_that_rule_nothing_out_are_ignored():
+    summary = ConversationSummary()
+    summary.fold("No idea, no problem either way. No musicals though", True, 200)
+    assert summary.ruled_out == ["No musicals though"]
+
+
+def test_round_trip_and_summaries_saved_before_the_digest():
+    summary = ConversationSummary()
+    summary.fold("I don't like slow movies", True, 200)
+    summary.fold("Maybe Heat (1995)?", False, 200)
+    restored = ConversationSummary.from_list(summary.to_list())
+    assert restored.render() == summary.render()
+    assert restored.tokens == summary.tokens
+
+    legacy = ConversationSummary.from_list([["User: hi"], 2, 5])
+    assert legacy.render() == "(2 earlier messages omitted)\nUser: hi"
+
+
+def test_small_budget_trims_the_digest_and_leaves_room_for_recent_messages():
+    session = ConversationSession("s")
+    builder = ContextBuilder(recent_turns=3, token_budget=150)
+    turns = [
+        (f"I hate film number {turn}, no gore, I already saw Title Number {turn}",
+         f"Then try Picture Number {turn} ({1950 + turn}) or Another Film {turn} ({2000 + turn})")
+        for turn in range(60)
+    ]
+
+    summary = play(session, builder, turns)
+    assert estimate_tokens(summary.render()) <= summary.tokens <= builder.summary_budget
+    assert summary.ruled_out  # what the user ruled out is trimmed last
+    assert builder.recent_messages(session, summary)
+
+
+def test_tokens_count_the_omitted_line():
+    summary = ConversationSummary()
+    for turn in range(20):
+        summary.fold(f"message {turn} " * 5, turn % 2 == 0, 60)
+    assert summary.omitted
+    rendered = summary.render().splitlines()
+    assert summary.tokens == sum(estimate_tokens(line) + 1 for line in rendered)
@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from preference_extractor import PreferenceExtractor  # noqa: E402
+
+VOCABULARY = {
+    "genre": {"comedy": ["funny movie"], "sci-fi": ["science fiction"]},
+    "actor": {"tom hanks": []},
+}
+
+
+def test_matches_are_case_insensitive_with_original_spans():
+    extractor = PreferenceExtractor(VOCABULARY)
+    text = "A Funny Movie with TOM HANKS"
+    matches = extractor.extract(text)
+    assert [(m.category, m.value) for m in matches] == [("genre", "comedy"), ("actor", "tom hanks")]
+    assert [text[m.start:m.end] for m in matches] == ["Funny Movie", "TOM HANKS"]
+
+
+def test_text_whose_lowercase_is_longer_still_matches():
+    extractor = PreferenceExtractor(VOCABULARY)
+    text = "I want a Comedy set in İstanbul, or Science Fiction with Tom Hanks"
+    matches = extractor.extract(text)
+    assert [m.value for m in matches] == ["comedy", "sci-fi", "tom hanks"]
+    assert [text[m.start:m.end] for m in matches] == ["Comedy", "Science Fiction", "Tom Hanks"]
@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from recommendation_cache import RecommendationCache  # noqa: E402
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    RecommendationCache(disk_path=path).set(("k",), {"a": 1})
+    cache = RecommendationCache(disk_path=path)
+    assert cache.get(("k",)) == {"a": 1}
+    assert cache.get(("k",)) == {"a": 1}
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_memory_hits_do_not_wait_on_a_locked_database(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = RecommendationCache(disk_path=path)
+    cache.set(("hot",), "value")
+    locker = sqlite3.connect(path, isolation_level=None)
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        slow = threading.Thread(target=cache.get, args=(("cold",),))
+        slow.start()
+        time.sleep(0.05)
+        start = time.monotonic()
+        assert cache.get(("hot",)) == "value"
+        assert time.monotonic() - start < 0.2
+        slow.join()
+    finally:
+        locker.execute("ROLLBACK")
+        locker.close()
+    assert cache.stats()["disk_errors"] == 1
+
+
+def test_disk_errors_are_best_effort(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = RecommendationCache(disk_path=path)
+    locker = sqlite3.connect(path, isolation_level=None)
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        cache.set(("k",), "v")
+        assert cache.get(("k",)) == "v"
+        assert cache.get(("missing",)) is None
+        cache.clear()
+    finally:
+        locker.execute("ROLLBACK")
+        locker.close()
+    assert cache.stats()["disk_errors"] == 3
@@ -0,0 +1,79 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import movie_recommender as core  # noqa: E402
+from llm_backend import LLMBackend  # noqa: E402
+
+
+class ReplyBackend(LLMBackend):
+    name = "reply"
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def generate(self, prompt, timeout=None):
+        return self.reply
+
+
+def test_unparseable_final_reply_falls_back_to_the_catalog():
+    preferences = {"genre": "horror", "mood": "scary", "year": "1987"}
+    fallbacks = core.FALLBACKS.labels('final')
+    before = fallbacks.value
+
+    result = core.recommend_for_preferences(preferences, llm=ReplyBackend("I can't answer in JSON today"))
+
+    assert fallbacks.value == before + 1
+    assert result["fallback"] is True
+    catalog = core.get_fallback_recommendations(preferences)
+    assert result["single_recommendation"] == catalog["single_recommendation"]
+    assert result["ten_recommendations"] == catalog["ten_recommendations"]
+
+
+def test_parsed_final_reply_is_not_a_fallback():
+    preferences = {"genre": "comedy", "mood": "silly", "year": "1991"}
+    reply = '{"single_recommendation": "Up (2009) - warm", "ten_recommendations": "Up, Coco"}'
+
+    result = core.recommend_for_preferences(preferences, llm=ReplyBackend(reply))
+
+    assert result["fallback"] is False
+    assert result["single_recommendation"] == "Up (2009) - warm"
+
+
+class StreamBackend(ReplyBackend):
+    deadline = 5
+
+    def stream(self, prompt, timeout=None):
+        yield from self.reply
+
+
+def stream_turn(monkeypatch, chunks, session_id):
+    monkeypatch.setattr(core, "llm_backend", StreamBackend(chunks))
+    monkeypatch.setattr(core, "LOCAL_MODE", False)
+    response = core.app.test_client().post('/recommend/stream', json={'text': 'hello there', 'session_id': session_id})
+    return response.get_data(as_text=True)
+
+
+def test_stream_times_the_model_and_parse_stages(monkeypatch):
+    model_before = core.MODEL_STAGE.snapshot()[2]
+    parse_before = core.PARSE_STAGE.snapshot()[2]
+
+    body = stream_turn(monkeypatch, ['{"ai_response": "How about ', 'Up (2009)?", "is_asking_question": true, '
+                                     '"conversation_complete": false}'], "stream-timed")
+
+    assert "event: recommendation" in body
+    assert core.MODEL_STAGE.snapshot()[2] == model_before + 1
+    assert core.PARSE_STAGE.snapshot()[2] == parse_before + 1
+
+
+def test_stream_falls_back_on_a_reply_without_ai_response(monkeypatch):
+    fallbacks = core.FALLBACKS.labels('dynamic')
+    before = fallbacks.value
+
+    body = stream_turn(monkeypatch, ['{"is_asking_question": true, "conversation_complete": false}'],
+                       "stream-fallback")
+
+    assert fallbacks.value == before + 1
+    assert core.build_fallback_question()["ai_response"] in body
+    assert "event: recommendation" in body
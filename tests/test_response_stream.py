@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from response_stream import AiResponseStreamParser  # noqa: E402
+
+
+def feed_all(chunks):
+    parser = AiResponseStreamParser()
+    return "".join(parser.feed(chunk) for chunk in chunks), parser
+
+
+def test_streams_ai_response_and_closes_on_outer_brace():
+    text, parser = feed_all(['{"is_asking_question": false, "ai_re', 'sponse": "Try Up', ' (2009)", "x": 1}', ' trailing'])
+    assert text == "Try Up (2009)"
+    assert parser.closed
+    assert parser.raw.endswith(" trailing")
+
+
+def test_ignores_ai_response_keys_below_the_top_level():
+    text, _ = feed_all(['{"meta": {"ai_response": "no"}, "list": ["ai_response", "no"], "ai_response": "yes"}'])
+    assert text == "yes"
+
+
+def test_ignores_ai_response_used_as_a_value():
+    text, _ = feed_all(['{"key": "ai_response", "ai_response": "yes"}'])
+    assert text == "yes"
+
+
+def test_simple_escape_split_across_chunks():
+    text, _ = feed_all(['{"ai_response": "line one\\', 'nline \\', '"two\\', '"\\\\"}'])
+    assert text == 'line one\nline "two"\\'
+
+
+def test_unicode_escape_split_inside_the_hex_digits():
+    text, _ = feed_all(['{"ai_response": "caf\\u00', 'e9 \\', 'u00e', '9"}'])
+    assert text == "café é"
+
+
+def test_surrogate_pair_split_between_and_inside_escapes():
+    text, _ = feed_all(['{"ai_response": "\\ud83c', '\\udf', 'ac!"}'])
+    assert text == "\U0001F3AC!"
+
+
+def test_every_split_point_decodes_like_json_loads():
+    document = json.dumps({
+        "ai_response": 'Quote "this", tab\there, slash / \\ café \U0001F3AC\nend',
+        "conversation_complete": False,
+    }, ensure_ascii=True)
+    expected = json.loads(document)["ai_response"]
+    for i in range(len(document) + 1):
+        for j in range(i, len(document) + 1):
+            text, parser = feed_all([document[:i], document[i:j], document[j:]])
+            assert text == expected, (i, j)
+            assert parser.closed
+
+
+def test_code_fence_before_the_json_is_not_streamed():
+    text, parser = feed_all(['```json\n{"ai_resp', 'onse": "Hi"}\n```'])
+    assert text == "Hi"
+    assert parser.closed
+
+
+def test_plain_text_reply_is_streamed_as_it_arrives():
+    parser = AiResponseStreamParser()
+    assert parser.feed("  How about ") == "How about "
+    assert parser.feed("Up (2009)? It's \"lovely\"") == "Up (2009)? It's \"lovely\""
+    assert not parser.closed
+
+
+def test_plain_text_stops_at_a_json_object():
+    text, parser = feed_all(['Sure! ', '{"ai_response": "Up"}'])
+    assert text == "Sure! Up"
+    assert parser.closed
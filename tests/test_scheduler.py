@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from llm_backend import CircuitBreaker, CircuitOpenError, LLMBackend, ResilientBackend  # noqa: E402
+import movie_recommender as core  # noqa: E402
+from scheduler import PRIORITY_BACKGROUND, PRIORITY_ONGOING, LoadShed, ModelCallScheduler, ScheduledBackend  # noqa: E402
+
+
+class EchoBackend(LLMBackend):
+    name = "echo"
+
+    def generate(self, prompt, timeout=None):
+        return prompt
+
+
+def test_open_breaker_rejects_before_queueing():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    scheduler = ModelCallScheduler(rate=1, burst=1, queue_timeout=5)
+    backend = ScheduledBackend(ResilientBackend(EchoBackend(), breaker=breaker), scheduler)
+
+    start = time.monotonic()
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            backend.generate("hi")
+    assert time.monotonic() - start < 0.5
+    assert scheduler.stats()["admitted"] == 0
+    assert scheduler.stats()["queued"] == 0
+
+
+def test_half_open_breaker_lets_one_trial_through_the_scheduler():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    scheduler = ModelCallScheduler()
+    backend = ScheduledBackend(ResilientBackend(EchoBackend(), breaker=breaker), scheduler)
+
+    assert backend.generate("trial") == "trial"
+    assert breaker.stats()["state"] == CircuitBreaker.CLOSED
+
+
+class SlowCountingBackend(LLMBackend):
+    name = "slow"
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, prompt, timeout=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return prompt
+
+
+def run_model_call(llm, priority, queue_timeout, results):
+    with core.model_scheduler.priority(priority, queue_timeout=queue_timeout):
+        results.append(core.ModelCall("same prompt", str.upper, llm=llm).run())
+
+
+def test_foreground_calls_do_not_join_background_calls():
+    llm = SlowCountingBackend(0.3)
+    results = []
+    background = threading.Thread(target=run_model_call, args=(llm, PRIORITY_BACKGROUND, None, results))
+    background.start()
+    time.sleep(0.05)
+    run_model_call(llm, PRIORITY_ONGOING, 1, results)
+    background.join()
+    assert llm.calls == 2
+    assert results == ["SAME PROMPT", "SAME PROMPT"]
+
+
+def test_calls_of_the_same_class_share_one_model_call():
+    llm = SlowCountingBackend(0.3)
+    results = []
+    threads = [
+        threading.Thread(target=run_model_call, args=(llm, PRIORITY_ONGOING, 1, results))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert llm.calls == 1
+    assert results == ["SAME PROMPT"] * 3
+
+
+def test_zero_size_queue_sheds_instead_of_failing():
+    scheduler = ModelCallScheduler(rate=1, burst=1, max_queue=0, queue_timeout=5)
+    scheduler.acquire()
+    with pytest.raises(LoadShed):
+        scheduler.acquire()
+    assert scheduler.stats()["shed_queue_full"] == 1
+
+
+def test_full_queue_displaces_worse_work_and_sheds_equal_work():
+    scheduler = ModelCallScheduler(rate=5, burst=1, max_queue=1, queue_timeout=5)
+    scheduler.acquire()
+    outcomes = {}
+
+    def wait(name, priority):
+        try:
+            scheduler.acquire(priority)
+            outcomes[name] = "ok"
+        except LoadShed:
+            outcomes[name] = "shed"
+
+    background = threading.Thread(target=wait, args=("background", PRIORITY_BACKGROUND))
+    background.start()
+    time.sleep(0.05)
+    ongoing = threading.Thread(target=wait, args=("ongoing", PRIORITY_ONGOING))
+    ongoing.start()
+    time.sleep(0.05)
+    with pytest.raises(LoadShed):
+        scheduler.acquire(PRIORITY_ONGOING)
+    background.join()
+    ongoing.join()
+    assert outcomes == {"background": "shed", "ongoing": "ok"}
+
+
+def test_queue_timeout_none_waits_past_the_default_deadline():
+    scheduler = ModelCallScheduler(rate=2, burst=1, queue_timeout=0.1)
+    scheduler.acquire()
+    with pytest.raises(LoadShed):
+        scheduler.acquire()
+    with scheduler.priority(PRIORITY_BACKGROUND, queue_timeout=None):
+        scheduler.acquire()
+    assert scheduler.stats()["shed_predicted_wait"] == 1
@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from session_store import SQLiteSessionStore  # noqa: E402
+
+
+def play_turn(store, session_id, text):
+    session = store.get_or_create(session_id)
+    assert session.begin_turn(session.turn + 1)
+    session.add_message(text, is_user=True)
+    session.add_message("reply to " + text, is_user=False)
+    return session
+
+
+def test_concurrent_turns_keep_the_first_save(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a, worker_b = SQLiteSessionStore(path), SQLiteSessionStore(path)
+    worker_a.create("s")
+
+    first = play_turn(worker_a, "s", "from a")
+    second = play_turn(worker_b, "s", "from b")
+    assert worker_a.save(first)
+    assert not worker_b.save(second)
+    assert worker_b.stats()["conflicts"] == 1
+
+    stored = worker_b.get("s")
+    assert stored.turn == 1
+    assert [text for text, _, _ in stored.conversation_history] == ["from a", "reply to from a"]
+
+
+def test_a_reloaded_session_saves_after_a_conflict(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a, worker_b = SQLiteSessionStore(path), SQLiteSessionStore(path)
+    worker_a.create("s")
+    stale = worker_b.get("s")
+    assert worker_a.save(play_turn(worker_a, "s", "one"))
+
+    assert stale.begin_turn(1)
+    assert not worker_b.save(stale)
+    assert worker_b.save(play_turn(worker_b, "s", "two"))
+    assert worker_a.get("s").turn == 2
+
+
+def test_create_returns_a_live_session_instead_of_replacing_it(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a, worker_b = SQLiteSessionStore(path), SQLiteSessionStore(path)
+    assert worker_a.save(play_turn(worker_a, "s", "kept"))
+
+    session = worker_b.create("s")
+    assert session.turn == 1
+    assert worker_b.stats()["created"] == 0
+
+
+def test_a_pruned_session_is_stored_again_on_save(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    session = play_turn(store, "s", "hello")
+    store.delete("s")
+    assert store.save(session)
+    assert store.get("s").turn == 1
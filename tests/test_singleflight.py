@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from singleflight import SingleFlight, SingleFlightTimeout  # noqa: E402
+
+
+def slow(value, delay=0.2, calls=None):
+    def fn():
+        if calls is not None:
+            calls.append(value)
+        time.sleep(delay)
+        return value
+    return fn
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls, results = [], []
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.do("k", slow("v", calls=calls))))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["v"]
+    assert results == ["v"] * 4
+    assert flights.stats()["coalesced_calls"] == 3
+    assert flights.in_flight() == 0
+
+
+def test_followers_receive_the_leaders_error():
+    flights = SingleFlight()
+    errors = []
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flights.do("k", fail)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == ["boom"] * 3
+
+
+def test_follower_gives_up_after_the_timeout():
+    flights = SingleFlight(timeout=0.05)
+    leader = threading.Thread(target=flights.do, args=("k", slow("v", delay=0.3)))
+    leader.start()
+    time.sleep(0.01)
+    with pytest.raises(SingleFlightTimeout):
+        flights.do("k", slow("other"))
+    leader.join()
+    assert flights.stats()["follower_timeouts"] == 1
+
+
+def test_async_followers_join_a_thread_leader():
+    flights = SingleFlight()
+    calls = []
+    leader = threading.Thread(target=flights.do, args=("k", slow("v", calls=calls)))
+    leader.start()
+    time.sleep(0.02)
+
+    async def follow():
+        async def never():
+            raise AssertionError("a follower must not run its own call")
+        return await asyncio.gather(*(flights.ado("k", never) for _ in range(3)))
+
+    assert asyncio.run(follow()) == ["v"] * 3
+    leader.join()
+    assert calls == ["v"]